@@ -1,12 +1,23 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
+from redis.exceptions import RedisError
 from typing import Optional
 from datetime import datetime
+import logging
 import uuid
 
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+def _session_key(session_id: str) -> str:
+    """Redis key a session is stored under"""
+    return f"session:{session_id}"
+
+
 class SessionCreate(BaseModel):
     """Session creation request"""
     candidate_name: str
@@ -24,14 +35,17 @@ class SessionResponse(BaseModel):
 
 
 @router.post("/create", response_model=SessionResponse)
-async def create_session(session_data: SessionCreate):
+async def create_session(
+    session_data: SessionCreate,
+    request: Request,
+    settings: Settings = Depends(get_settings)
+):
     """
     Create a new proctoring session
     """
     session_id = str(uuid.uuid4())
 
-    # TODO: Store session in database
-    return SessionResponse(
+    session = SessionResponse(
         session_id=session_id,
         candidate_name=session_data.candidate_name,
         interview_type=session_data.interview_type,
@@ -39,20 +53,54 @@ async def create_session(session_data: SessionCreate):
         status="active"
     )
 
+    # Stored through the shared Redis pool created at startup; sessions
+    # expire along with the access token issued for them
+    try:
+        await request.app.state.redis.set(
+            _session_key(session_id),
+            session.model_dump_json(),
+            ex=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        )
+    except RedisError as e:
+        logger.error(f"Failed to store session {session_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Session storage unavailable")
+
+    return session
+
 
 @router.get("/{session_id}", response_model=SessionResponse)
-async def get_session(session_id: str):
+async def get_session(session_id: str, request: Request):
     """
     Get session details
     """
-    # TODO: Retrieve from database
-    raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        stored = await request.app.state.redis.get(_session_key(session_id))
+    except RedisError as e:
+        logger.error(f"Failed to load session {session_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Session storage unavailable")
+
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    return SessionResponse.model_validate_json(stored)
 
 
 @router.post("/{session_id}/end")
-async def end_session(session_id: str):
+async def end_session(session_id: str, request: Request):
     """
     End a proctoring session
     """
-    # TODO: Update session status in database
+    key = _session_key(session_id)
+    try:
+        stored = await request.app.state.redis.get(key)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        session = SessionResponse.model_validate_json(stored)
+        session.status = "ended"
+        await request.app.state.redis.set(key, session.model_dump_json(), keepttl=True)
+    except RedisError as e:
+        logger.error(f"Failed to end session {session_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Session storage unavailable")
+
     return {"status": "success", "message": "Session ended"}
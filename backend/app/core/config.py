@@ -1,4 +1,5 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import lru_cache
 from typing import List
 
 
@@ -10,6 +11,8 @@ class Settings(BaseSettings):
     PORT: int = 8000
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
+    WORKERS: int = 1  # Uvicorn worker processes (ignored when DEBUG reload is on)
+    LOG_LEVEL: str = "INFO"  # Set to DEBUG for per-frame diagnostics
 
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -26,6 +29,12 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 64  # Size of the shared connection pool
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.1  # Connect/read timeout, so a hung Redis can't stall frames (the frame cache backs off on timeout)
+
+    # Frame result cache (memoizes results for duplicate frame bytes in Redis)
+    ENABLE_FRAME_CACHE: bool = False  # Requires a reachable Redis server
+    FRAME_CACHE_TTL_SECONDS: int = 5
 
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -34,23 +43,56 @@ class Settings(BaseSettings):
 
     # ML Model Configuration (based on Proctoring-AI standards)
     MODEL_CONFIDENCE_THRESHOLD: float = 0.6  # Proctoring-AI uses 0.6 for object detection
+    OBJECT_DETECTOR_MODEL: str = "yolov8n.onnx"  # .onnx (ONNX Runtime), .xml (OpenVINO) or .engine (TensorRT); falls back to yolov8n.pt via ultralytics if missing
+    OBJECT_BATCH_MAX_SIZE: int = 8  # Frames per shared cross-session detection batch (1 = one detector per session, no batching)
+    OBJECT_BATCH_WAIT_MS: int = 10  # How long a frame waits for others to join its batch
+    OBJECT_ROI_FULL_FRAME_INTERVAL: int = 10  # With a per-session dynamic-shape detector: search only around the person at 320x320, full frame every N frames (0 = always full frame)
+    OBJECT_IDLE_SKIP_MAX: int = 4  # Sessions without detections run object detection on as few as 1 in N+1 frames (0 = every frame)
+    OBJECT_IDLE_RAMP_SECONDS: float = 5.0  # Clean time before one more frame is skipped between object detection runs
     EYE_GAZE_THRESHOLD: float = 2.0  # seconds before alert
     ALERT_COOLDOWN_SECONDS: int = 3  # Cooldown between alerts
     MAX_FACES_ALLOWED: int = 1  # Only one person allowed during exam
+    INFERENCE_WORKERS: int = 0  # Frame processing threads (0 = one per CPU core)
+    DECODE_WORKERS: int = 2  # Threads decoding incoming frames off the event loop (0 = decode on the loop)
+    REQUIRE_TURBOJPEG: bool = False  # Refuse to start without libjpeg-turbo instead of falling back to cv2.imdecode (set in the Docker image)
+    INGEST_MAX_WIDTH: int = 640  # Downscale wider frames once at decode time (0 = keep full size)
+    MODEL_INPUT_MAX_WIDTH: int = 640  # FaceMesh input width; iris analysis stays at full size (0 = full size)
 
     # Gemini AI for Violation Verification
     GEMINI_API_KEY: str = ""  # Set in .env file
     GEMINI_MODEL: str = "gemini-1.5-flash"  # Fast and cost-effective
     ENABLE_AI_VERIFICATION: bool = False  # Set to True and add GEMINI_API_KEY to enable AI verification
     AI_VERIFICATION_CONFIDENCE_THRESHOLD: float = 0.7  # Only verify if AI is 70%+ confident it's genuine
+    GEMINI_CACHE_TTL_SECONDS: float = 2.0  # Reuse a verdict for near-identical frames within this window
+    GEMINI_MAX_CONCURRENT: int = 4  # Gemini requests in flight across all sessions
+    GEMINI_MAX_PENDING: int = 16  # Requests allowed to wait for a slot; later ones pass through unverified
+    GEMINI_TIMEOUT_SECONDS: float = 5.0  # Slot wait + API call; on timeout the violation passes through unverified
+    AI_PREFILTER_WINDOW: int = 5  # Recent frames a face/object violation is voted over before Gemini sees it
+    AI_PREFILTER_MIN_HITS: int = 3  # Frames of that window the violation must appear in
+    AI_PREFILTER_MIN_CONFIDENCE: float = 0.75  # Object confidence needed for a frame to count as a hit
+
+    # WebSocket transport
+    WS_MAX_MESSAGE_BYTES: int = 4 * 1024 * 1024  # Largest accepted frame message (4 MiB)
+
+    # WebSocket result batching
+    WS_BATCH_INTERVAL_MS: int = 50  # Max time to wait for more results before sending a batch
+    WS_BATCH_MAX_SIZE: int = 10  # Send immediately once this many results are pending
 
     # Recording
     ENABLE_RECORDING: bool = False
     RECORDING_PATH: str = "./recordings"
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Frozen: settings are read-only once loaded (also makes the instance hashable)
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Load settings once and return the same instance afterwards
+    Use with Depends(get_settings) in route handlers
+    """
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
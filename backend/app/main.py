@@ -1,27 +1,45 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
-import cv2
-import numpy as np
+import logging.handlers
+import os
+import queue
+import redis.asyncio as redis
 
-from app.core.config import settings
+from app.core.config import Settings, get_settings, settings
 from app.api.routes import proctoring, session
+from app.ml_models.object_detector import ObjectDetector
 from app.services.connection_manager import ConnectionManager
-from app.services.proctoring_service import ProctoringService
-
-# Configure logging
+from app.services.detection_batcher import ObjectDetectionBatcher
+from app.services.frame_cache import FrameResultCache
+from app.services.frame_pipeline import FramePipeline
+from app.utils.frame_decoder import FrameDecoder
+
+# Configure logging - records are handed to a background listener thread through
+# a queue, so handler I/O never blocks the event loop
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
 logging.basicConfig(
-    level=logging.DEBUG,  # Changed to DEBUG for more details
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=settings.LOG_LEVEL,
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_listener.start()
 logger = logging.getLogger(__name__)
 
-# Connection manager for WebSocket connections
+# Connection manager for WebSocket connections (owns one proctoring service per session)
 manager = ConnectionManager()
 
-# Proctoring service (global instance)
-proctoring_service = ProctoringService()
+# JPEG decoder for incoming frames (libjpeg-turbo when available),
+# downscaling once at ingest to the resolution the models work at
+frame_decoder = FrameDecoder(
+    max_width=settings.INGEST_MAX_WIDTH,
+    require_turbojpeg=settings.REQUIRE_TURBOJPEG
+)
 
 
 @asynccontextmanager
@@ -29,8 +47,57 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("🚀 Starting AI Proctor Backend...")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
+
+    # Shared async Redis client for the whole app (connections are opened lazily
+    # from its pool and reused across requests and WebSocket sessions)
+    app.state.redis = redis.from_url(
+        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}",
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS
+    )
+    app.state.frame_cache = (
+        FrameResultCache(app.state.redis, ttl_seconds=settings.FRAME_CACHE_TTL_SECONDS)
+        if settings.ENABLE_FRAME_CACHE else None
+    )
+
+    # Worker pool for CPU-bound frame processing (OpenCV/MediaPipe/PyTorch release the GIL)
+    app.state.pool = ThreadPoolExecutor(
+        max_workers=settings.INFERENCE_WORKERS or os.cpu_count(),
+        thread_name_prefix="inference"
+    )
+    # Separate small pool for JPEG decoding, so decodes never queue behind inference
+    app.state.decode_pool = (
+        ThreadPoolExecutor(max_workers=settings.DECODE_WORKERS, thread_name_prefix="decode")
+        if settings.DECODE_WORKERS > 0 else None
+    )
+
+    # One object detector for all sessions; frames from concurrent sessions are
+    # coalesced into a single batched inference call
+    app.state.object_detector = None
+    if settings.OBJECT_BATCH_MAX_SIZE > 1:
+        detector = await asyncio.get_running_loop().run_in_executor(
+            app.state.pool,
+            lambda: ObjectDetector(
+                model_path=settings.OBJECT_DETECTOR_MODEL,
+                confidence_threshold=settings.MODEL_CONFIDENCE_THRESHOLD,
+                max_batch=settings.OBJECT_BATCH_MAX_SIZE
+            )
+        )
+        app.state.object_detector = ObjectDetectionBatcher(detector, max_wait_ms=settings.OBJECT_BATCH_WAIT_MS)
+        # Frames at or below the model width reach the detector as decoded, so
+        # decode into buffers it can upload directly (page-locked with TensorRT)
+        frame_decoder.allocator = detector.host_buffer
+
     yield
     logger.info("👋 Shutting down AI Proctor Backend...")
+    if app.state.object_detector is not None:
+        app.state.object_detector.close()
+    app.state.pool.shutdown(wait=False, cancel_futures=True)
+    if app.state.decode_pool is not None:
+        app.state.decode_pool.shutdown(wait=False, cancel_futures=True)
+    await app.state.redis.aclose()
+    log_listener.stop()
 
 
 # Initialize FastAPI app
@@ -66,7 +133,7 @@ async def root():
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(settings: Settings = Depends(get_settings)):
     """Detailed health check"""
     return {
         "status": "healthy",
@@ -80,55 +147,38 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint for real-time video streaming and proctoring
     """
-    await manager.connect(websocket, session_id)
-    logger.info(f"Client connected to session: {session_id}")
-
-    # Start the proctoring session
-    proctoring_service.start_session(session_id)
+    # Set once the session is registered (connect() cleans up after itself if it fails)
+    proctoring_service = None
 
     try:
-        while True:
-            # Receive video frame data from client
-            data = await websocket.receive_bytes()
-            logger.info(f"Received {len(data)} bytes from session {session_id}")
-
-            # Convert bytes to image
-            nparr = np.frombuffer(data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-            if image is not None:
-                # Process the frame with ML models
-                results = proctoring_service.process_frame(image, session_id)
-
-                # Log alerts being sent
-                if results.get('alerts'):
-                    logger.info(f"🚨 Sending {len(results['alerts'])} ALERTS to frontend for session {session_id}")
-                    for alert in results['alerts']:
-                        logger.info(f"  📢 Alert: {alert['type']} - {alert['message']} (severity: {alert['severity']})")
-
-                # Send results back to client
-                await websocket.send_json({
-                    "type": "proctoring_result",
-                    "data": results,
-                    "session_id": session_id
-                })
-
-                # Log violations
-                if results.get('violations'):
-                    logger.warning(f"Session {session_id}: {len(results['violations'])} violations detected")
-                    for violation in results['violations']:
-                        logger.warning(f"  - {violation['type']}: {violation['description']}")
-            else:
-                logger.error(f"Failed to decode image for session {session_id}")
-
+        proctoring_service = await manager.connect(
+            websocket, session_id, websocket.app.state.pool, websocket.app.state.object_detector
+        )
+        logger.info(f"Client connected to session: {session_id}")
+
+        # Start the proctoring session
+        proctoring_service.start_session(session_id)
+
+        # Receive/decode, inference and sending run as overlapping stages
+        pipeline = FramePipeline(
+            websocket,
+            session_id,
+            proctoring_service,
+            frame_decoder,
+            websocket.app.state.pool,
+            websocket.app.state.frame_cache,
+            websocket.app.state.decode_pool
+        )
+
+        await pipeline.run()
     except WebSocketDisconnect:
-        proctoring_service.end_session(session_id)
-        manager.disconnect(session_id)
         logger.info(f"Client disconnected from session: {session_id}")
     except Exception as e:
         logger.error(f"WebSocket error in session {session_id}: {str(e)}")
-        proctoring_service.end_session(session_id)
-        manager.disconnect(session_id)
+    finally:
+        if proctoring_service is not None:
+            proctoring_service.end_session(session_id)
+            manager.disconnect(session_id, websocket, proctoring_service)
 
 
 if __name__ == "__main__":
@@ -137,5 +187,12 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
+        loop="uvloop",  # libuv-based event loop, much cheaper per I/O callback
+        http="httptools",
+        ws="websockets",
+        ws_max_size=settings.WS_MAX_MESSAGE_BYTES,
+        ws_per_message_deflate=False,  # Frames are JPEG already, deflate only costs CPU
         reload=settings.DEBUG,
+        # Reload mode only supports a single worker
+        workers=1 if settings.DEBUG else settings.WORKERS,
     )
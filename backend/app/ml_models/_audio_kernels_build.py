@@ -0,0 +1,25 @@
+"""
+Ahead-of-time build of the audio kernels with numba.pycc
+
+Run from the backend directory (needs Numba and a C compiler, build time only):
+    python -m app.ml_models._audio_kernels_build
+
+Produces the _audio_kernels extension module next to this file, which
+audio_analyzer.py imports in preference to JIT-compiling on first use.
+"""
+import os
+
+from numba.pycc import CC
+
+from app.ml_models import audio_kernels
+
+cc = CC('_audio_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Float audio is always float32 by the time it reaches the kernel (see analyze_audio)
+cc.export('audio_features', 'Tuple((f8, f8, b1))(f4[:], f8)')(audio_kernels.audio_features)
+cc.export('audio_features_int16', 'Tuple((f8, f8, b1))(i2[:], f8)')(audio_kernels.audio_features_int16)
+
+
+if __name__ == "__main__":
+    cc.compile()
@@ -0,0 +1,150 @@
+"""
+One-time export of the YOLOv8n detector for ONNX Runtime, OpenVINO or TensorRT
+
+Run from the backend directory (needs ultralytics/torch, export time only):
+    python -m app.ml_models._yolo_export            # FP32, CPU
+    python -m app.ml_models._yolo_export --half     # FP16, for onnxruntime-gpu
+    python -m app.ml_models._yolo_export --int8 --calibration-dir frames/
+    python -m app.ml_models._yolo_export --engine   # FP16 TensorRT (on the target GPU)
+    python -m app.ml_models._yolo_export --batch 8  # Batched inference across sessions
+    python -m app.ml_models._yolo_export --dynamic  # Also 320x320 person-ROI inference
+    python -m app.ml_models._yolo_export --openvino --int8 --calibration-dir frames/
+
+Produces yolov8n.onnx (the default OBJECT_DETECTOR_MODEL), which
+object_detector.py runs on ONNX Runtime instead of the PyTorch model, or
+yolov8n.engine for the TensorRT runtime, or yolov8n.xml (+ .bin) for
+OpenVINO on CPU-only servers. Engines are specific to the GPU and TensorRT
+version they were built with, so build them where they run. INT8 export
+quantizes statically using letterboxed proctoring frames (~200 JPEG/PNG
+stills from real sessions) for calibration: ONNX Runtime QDQ for .onnx,
+NNCF for OpenVINO (needs nncf, export time only).
+"""
+import argparse
+import glob
+import os
+import shutil
+
+import numpy as np
+from ultralytics import YOLO
+
+from app.ml_models.object_detector import ObjectDetector
+
+
+def export(weights: str, output: str, half: bool, format: str = 'onnx', batch: int = 1,
+           dynamic: bool = False) -> str:
+    """
+    Export weights to a 640x640 ONNX graph (or TensorRT engine / OpenVINO IR) and move it to output
+
+    With batch > 1 or dynamic the ONNX / OpenVINO graph gets dynamic batch and
+    input size dimensions (any batch up to OBJECT_BATCH_MAX_SIZE, and the
+    320x320 ROI input as well as 640x640); an engine is built for exactly
+    that batch at 640x640.
+    """
+    if format == 'onnx':
+        options = {'simplify': True, 'dynamic': batch > 1 or dynamic}
+    elif format == 'openvino':
+        options = {'dynamic': batch > 1 or dynamic}
+    else:
+        options = {'workspace': 4, 'batch': batch, 'dynamic': False}
+    path = YOLO(weights).export(
+        format=format, imgsz=ObjectDetector.INPUT_SIZE, half=half, **options
+    )
+    if format == 'openvino':
+        # ultralytics writes a yolov8n_openvino_model/ directory; keep just the .xml/.bin pair
+        import openvino as ov
+        ov.save_model(ov.Core().read_model(glob.glob(os.path.join(path, '*.xml'))[0]), output, compress_to_fp16=half)
+        shutil.rmtree(path)
+    elif os.path.abspath(path) != os.path.abspath(output):
+        shutil.move(path, output)
+    return output
+
+
+def calibration_inputs(calibration_dir: str, max_frames: int = 200):
+    """Yield letterboxed (1, 3, S, S) float32 inputs made from recorded frames"""
+    import cv2
+
+    files = sorted(
+        f for ext in ('*.jpg', '*.jpeg', '*.png')
+        for f in glob.glob(os.path.join(calibration_dir, ext))
+    )[:max_frames]
+    if not files:
+        raise SystemExit(f"No calibration frames found in {calibration_dir}")
+
+    # Reuse the detector's own letterboxing so calibration sees real inputs
+    letterbox = ObjectDetector.__new__(ObjectDetector)
+    size = ObjectDetector.INPUT_SIZE
+    letterbox._canvas = np.empty((size, size, 3), dtype=np.uint8)
+
+    for path in files:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        blob = np.empty((1, 3, size, size), dtype=np.float32)
+        letterbox._letterbox(image, blob[0])
+        yield blob
+
+
+def quantize_int8(model_path: str, output: str, calibration_dir: str):
+    """Statically quantize an FP32 ONNX model to INT8 (QDQ) with recorded frames"""
+    from onnxruntime.quantization import CalibrationDataReader, QuantType, quantize_static
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.inputs = calibration_inputs(calibration_dir)
+
+        def get_next(self):
+            blob = next(self.inputs, None)
+            return None if blob is None else {'images': blob}
+
+    quantize_static(
+        model_path, output, FrameReader(),
+        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True
+    )
+
+
+def quantize_openvino_int8(model_path: str, output: str, calibration_dir: str):
+    """Quantize an OpenVINO IR model to INT8 with NNCF (VNNI/AMX kernels on x86 CPUs)"""
+    import nncf
+    import openvino as ov
+
+    model = ov.Core().read_model(model_path)
+    # MIXED: symmetric weights, asymmetric activations (the YOLO activations aren't zero-centred)
+    quantized = nncf.quantize(
+        model, nncf.Dataset(list(calibration_inputs(calibration_dir))),
+        preset=nncf.QuantizationPreset.MIXED
+    )
+    ov.save_model(quantized, output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export YOLOv8n for ONNX Runtime, OpenVINO or TensorRT")
+    parser.add_argument('--weights', default='yolov8n.pt')
+    parser.add_argument('--output', help="Defaults to yolov8n.onnx (yolov8n.engine with --engine)")
+    parser.add_argument('--half', action='store_true', help="FP16 weights and input (GPU)")
+    parser.add_argument('--int8', action='store_true', help="Static INT8 quantization (CPU)")
+    parser.add_argument('--calibration-dir', help="Directory of proctoring frames for --int8")
+    parser.add_argument('--engine', action='store_true', help="FP16 TensorRT engine instead of ONNX")
+    parser.add_argument('--batch', type=int, default=1, help="Batch size for cross-session batching")
+    parser.add_argument('--openvino', action='store_true', help="OpenVINO IR (CPU) instead of ONNX")
+    parser.add_argument('--dynamic', action='store_true', help="Dynamic input size (enables 320x320 person-ROI detection)")
+    args = parser.parse_args()
+    extension = '.engine' if args.engine else '.xml' if args.openvino else '.onnx'
+    args.output = args.output or f'yolov8n{extension}'
+    if args.int8 and not args.calibration_dir:
+        parser.error("--int8 needs --calibration-dir")
+
+    if args.engine:
+        export(args.weights, args.output, half=True, format='engine', batch=args.batch)
+    elif args.openvino and args.int8:
+        fp32_path = export(args.weights, args.output.replace('.xml', '.fp32.xml'), half=False, format='openvino', batch=args.batch, dynamic=args.dynamic)
+        quantize_openvino_int8(fp32_path, args.output, args.calibration_dir)
+        os.remove(fp32_path)
+        os.remove(fp32_path.replace('.xml', '.bin'))
+    elif args.openvino:
+        export(args.weights, args.output, half=args.half, format='openvino', batch=args.batch, dynamic=args.dynamic)
+    elif args.int8:
+        fp32_path = export(args.weights, args.output.replace('.onnx', '.fp32.onnx'), half=False, batch=args.batch, dynamic=args.dynamic)
+        quantize_int8(fp32_path, args.output, args.calibration_dir)
+        os.remove(fp32_path)
+    else:
+        export(args.weights, args.output, half=args.half, batch=args.batch, dynamic=args.dynamic)
@@ -1,12 +1,63 @@
 import numpy as np
 import logging
+from dataclasses import dataclass
 from typing import Dict, Optional
-from collections import deque
 import time
 
+from app.ml_models import audio_kernels
+
 logger = logging.getLogger(__name__)
 
 
+# Fused audio feature kernels, fastest available first:
+# AOT-compiled extension (python -m app.ml_models._audio_kernels_build; no JIT
+# stall and no Numba needed at runtime), then Numba JIT, then plain NumPy
+try:
+    from app.ml_models._audio_kernels import audio_features as _audio_features
+    from app.ml_models._audio_kernels import audio_features_int16 as _audio_features_int16
+    AUDIO_KERNELS = 'aot'
+except ImportError:
+    try:
+        from numba import njit
+        _audio_features = njit(cache=True, fastmath=True)(audio_kernels.audio_features)
+        _audio_features_int16 = njit(cache=True)(audio_kernels.audio_features_int16)
+        AUDIO_KERNELS = 'jit'
+    except ImportError:
+        _audio_features = audio_kernels.audio_features_numpy
+        _audio_features_int16 = audio_kernels.audio_features_numpy
+        AUDIO_KERNELS = 'numpy'
+
+
+def pcm16_to_float32(raw: bytes) -> np.ndarray:
+    """
+    Convert 16-bit little-endian PCM from the wire to float32 samples in [-1, 1)
+
+    Args:
+        raw: Raw PCM bytes
+
+    Returns:
+        float32 numpy array
+    """
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) * np.float32(1 / 32768.0)
+
+
+@dataclass(slots=True)
+class AudioResult:
+    """Analysis of one audio chunk (serialized as an object by orjson)"""
+    energy: float
+    zero_crossing_rate: float
+    has_speech: bool
+    anomaly_detected: bool
+    anomaly_type: Optional[str]
+    anomaly_count: int
+    violation: bool
+    alert_type: Optional[str]
+    baseline_energy: Optional[float]
+    # Only set by detect_multiple_speakers_simple once enough history exists
+    possible_multiple_speakers: Optional[bool] = None
+    speaker_confidence: Optional[float] = None
+
+
 class AudioAnalyzer:
     """
     Analyzes audio for multiple speakers and anomalies
@@ -28,26 +79,46 @@ class AudioAnalyzer:
         self.speech_threshold = 0.02  # RMS threshold for speech detection
         self.noise_threshold = 0.05   # High energy threshold
 
-        # Track audio patterns
-        self.audio_history = deque(maxlen=50)  # Store last 50 frames
+        # Track audio patterns - struct-of-arrays ring buffer over the last 50 frames
+        self.history_size = 50
+        self._energy = np.zeros(self.history_size, dtype=np.float32)
+        self._zcr = np.zeros(self.history_size, dtype=np.float32)
+        self._speech = np.zeros(self.history_size, dtype=np.bool_)
+        self._idx = 0    # Next slot to write
+        self._count = 0  # Number of valid frames in the buffer
         self.baseline_energy = None
         self.anomaly_count = 0
         self.last_anomaly_time = None
 
-        logger.info("AudioAnalyzer initialized")
+        # Running sums of energy over the most recent frames, for O(1) variance
+        self.variance_window = 10
+        self._window_sum = 0.0
+        self._window_sumsq = 0.0
+
+        # Pay the JIT compilation cost now rather than on the first audio chunk
+        _audio_features(np.zeros(window_size, dtype=np.float32), self.speech_threshold)
+        _audio_features_int16(np.zeros(window_size, dtype=np.int16), self.speech_threshold)
+
+        logger.info(f"AudioAnalyzer initialized ({AUDIO_KERNELS} kernels)")
 
     def calculate_rms_energy(self, audio_data: np.ndarray) -> float:
         """
         Calculate RMS (Root Mean Square) energy of audio signal
         """
-        return np.sqrt(np.mean(audio_data ** 2))
+        audio_data = np.asarray(audio_data, dtype=np.float32)
+        return np.sqrt(np.mean(audio_data * audio_data))
 
     def calculate_zero_crossing_rate(self, audio_data: np.ndarray) -> float:
         """
         Calculate zero crossing rate (useful for voice activity detection)
         """
-        zero_crossings = np.sum(np.abs(np.diff(np.sign(audio_data)))) / 2
-        return zero_crossings / len(audio_data)
+        if len(audio_data) < 2:
+            return 0.0
+
+        # Single pass: sign bits of neighbouring samples differ at a crossing
+        non_negative = audio_data >= 0
+        zero_crossings = np.count_nonzero(non_negative[1:] ^ non_negative[:-1])
+        return zero_crossings / (len(audio_data) - 1)
 
     def detect_speech(self, audio_data: np.ndarray) -> bool:
         """
@@ -56,32 +127,49 @@ class AudioAnalyzer:
         energy = self.calculate_rms_energy(audio_data)
         return energy > self.speech_threshold
 
-    def analyze_audio(self, audio_data: np.ndarray) -> Dict:
+    def analyze_audio(self, audio_data: np.ndarray, now: Optional[float] = None) -> AudioResult:
         """
         Analyze audio chunk for anomalies
 
         Args:
-            audio_data: Audio data as numpy array (normalized -1 to 1)
+            audio_data: Raw int16 PCM (e.g. np.frombuffer(raw, np.int16)),
+                or float audio normalized -1 to 1
+            now: time.monotonic() reading for this chunk (read here if not given)
 
         Returns:
-            Dictionary with analysis results
+            AudioResult with analysis results
         """
-        # Calculate audio features
-        energy = self.calculate_rms_energy(audio_data)
-        zcr = self.calculate_zero_crossing_rate(audio_data)
-        has_speech = self.detect_speech(audio_data)
+        # Calculate audio features (RMS, ZCR and speech flag in one pass)
+        if audio_data.dtype == np.int16:
+            # PCM straight off the wire - no float conversion of the samples
+            energy, zcr, has_speech = _audio_features_int16(audio_data, self.speech_threshold)
+        else:
+            # Work in float32 throughout (no-op if the caller already passes float32)
+            audio_data = np.asarray(audio_data, dtype=np.float32)
+            energy, zcr, has_speech = _audio_features(audio_data, self.speech_threshold)
 
         # Initialize baseline if needed
         if self.baseline_energy is None and has_speech:
             self.baseline_energy = energy
 
+        # Drop the frame leaving the variance window (its slot is still intact)
+        i = self._idx
+        if self._count >= self.variance_window:
+            outgoing = float(self._energy[(i - self.variance_window) % self.history_size])
+            self._window_sum -= outgoing
+            self._window_sumsq -= outgoing * outgoing
+
         # Store in history
-        self.audio_history.append({
-            'energy': energy,
-            'zcr': zcr,
-            'has_speech': has_speech,
-            'timestamp': time.time()
-        })
+        self._energy[i] = energy
+        self._zcr[i] = zcr
+        self._speech[i] = has_speech
+        self._idx = (i + 1) % self.history_size
+        self._count = min(self._count + 1, self.history_size)
+
+        # Add the stored (float32) value so additions and removals cancel exactly
+        stored = float(self._energy[i])
+        self._window_sum += stored
+        self._window_sumsq += stored * stored
 
         # Detect anomalies
         anomaly_detected = False
@@ -94,8 +182,8 @@ class AudioAnalyzer:
             self.anomaly_count += 1
 
         # Sudden energy change
-        if len(self.audio_history) > 1:
-            prev_energy = self.audio_history[-2]['energy']
+        if self._count > 1:
+            prev_energy = self._energy[(self._idx - 2) % self.history_size]
             energy_change = abs(energy - prev_energy)
 
             if energy_change > 0.1 and has_speech:
@@ -104,7 +192,7 @@ class AudioAnalyzer:
 
         # Track anomaly timing
         if anomaly_detected:
-            current_time = time.time()
+            current_time = time.monotonic() if now is None else now
             if self.last_anomaly_time:
                 time_since_last = current_time - self.last_anomaly_time
             else:
@@ -116,19 +204,19 @@ class AudioAnalyzer:
         # Determine if this is a violation (multiple anomalies in short time)
         violation = self.anomaly_count > 3 and anomaly_detected
 
-        return {
-            'energy': float(energy),
-            'zero_crossing_rate': float(zcr),
-            'has_speech': has_speech,
-            'anomaly_detected': anomaly_detected,
-            'anomaly_type': anomaly_type,
-            'anomaly_count': self.anomaly_count,
-            'violation': violation,
-            'alert_type': 'multiple_voices_detected' if violation else None,
-            'baseline_energy': self.baseline_energy
-        }
-
-    def detect_multiple_speakers_simple(self, audio_data: np.ndarray) -> Dict:
+        return AudioResult(
+            energy=energy,
+            zero_crossing_rate=zcr,
+            has_speech=has_speech,
+            anomaly_detected=anomaly_detected,
+            anomaly_type=anomaly_type,
+            anomaly_count=self.anomaly_count,
+            violation=violation,
+            alert_type='multiple_voices_detected' if violation else None,
+            baseline_energy=self.baseline_energy
+        )
+
+    def detect_multiple_speakers_simple(self, audio_data: np.ndarray) -> AudioResult:
         """
         Simplified multiple speaker detection
         For production, use pyannote.audio speaker diarization
@@ -137,23 +225,30 @@ class AudioAnalyzer:
         analysis = self.analyze_audio(audio_data)
 
         # Very basic heuristic: rapid energy changes could indicate speaker changes
-        if len(self.audio_history) >= 10:
-            recent_energies = [frame['energy'] for frame in list(self.audio_history)[-10:]]
-            energy_variance = np.var(recent_energies)
+        n = self.variance_window
+        if self._count >= n:
+            mean = self._window_sum / n
+            energy_variance = max(self._window_sumsq / n - mean * mean, 0.0)
 
             # High variance could indicate multiple speakers
             if energy_variance > 0.01:
-                analysis['possible_multiple_speakers'] = True
-                analysis['speaker_confidence'] = min(energy_variance * 100, 1.0)
+                analysis.possible_multiple_speakers = True
+                analysis.speaker_confidence = min(energy_variance * 100, 1.0)
             else:
-                analysis['possible_multiple_speakers'] = False
-                analysis['speaker_confidence'] = 0.0
+                analysis.possible_multiple_speakers = False
+                analysis.speaker_confidence = 0.0
 
         return analysis
 
     def reset(self):
         """Reset analyzer state"""
-        self.audio_history.clear()
+        self._energy.fill(0)
+        self._zcr.fill(0)
+        self._speech.fill(False)
+        self._idx = 0
+        self._count = 0
+        self._window_sum = 0.0
+        self._window_sumsq = 0.0
         self.baseline_energy = None
         self.anomaly_count = 0
         self.last_anomaly_time = None
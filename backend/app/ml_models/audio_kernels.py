@@ -0,0 +1,82 @@
+"""
+Audio feature kernels shared by AudioAnalyzer
+
+Written in the nopython subset so the same source can be JIT-compiled with
+numba.njit or built ahead of time by _audio_kernels_build.py.
+"""
+import numpy as np
+
+
+def audio_features(audio_data, speech_threshold):
+    """
+    Fused RMS energy / zero crossing rate / speech flag kernel
+    One pass over the window instead of three separate NumPy reductions
+    """
+    n = audio_data.shape[0]
+    if n == 0:
+        return 0.0, 0.0, False
+
+    sum_sq = 0.0
+    zero_crossings = 0
+    prev_non_negative = audio_data[0] >= 0
+    for i in range(n):
+        sample = audio_data[i]
+        sum_sq += sample * sample
+        non_negative = sample >= 0
+        if non_negative != prev_non_negative:
+            zero_crossings += 1
+        prev_non_negative = non_negative
+
+    mean_sq = sum_sq / n
+    zcr = zero_crossings / (n - 1) if n > 1 else 0.0
+    return np.sqrt(mean_sq), zcr, mean_sq > speech_threshold * speech_threshold
+
+
+def audio_features_int16(audio_data, speech_threshold):
+    """
+    Integer-arithmetic variant of audio_features for raw int16 PCM
+    Samples are squared and summed in int64; only the final RMS is scaled to [-1, 1)
+    """
+    n = audio_data.shape[0]
+    if n == 0:
+        return 0.0, 0.0, False
+
+    sum_sq = np.int64(0)
+    zero_crossings = 0
+    prev = np.int64(audio_data[0])
+    for i in range(n):
+        sample = np.int64(audio_data[i])
+        sum_sq += sample * sample
+        # Sign bits differ at a crossing
+        if (sample ^ prev) < 0:
+            zero_crossings += 1
+        prev = sample
+
+    # energy > threshold  <=>  sum_sq > (threshold * 32768)^2 * n
+    threshold_pcm = speech_threshold * 32768.0
+    has_speech = sum_sq > threshold_pcm * threshold_pcm * n
+
+    zcr = zero_crossings / (n - 1) if n > 1 else 0.0
+    return np.sqrt(sum_sq / n) / 32768.0, zcr, has_speech
+
+
+def audio_features_numpy(audio_data, speech_threshold):
+    """
+    Vectorized NumPy equivalent of the kernels, used when Numba is unavailable
+    Accepts float audio normalized -1 to 1 or raw int16 PCM
+    """
+    if audio_data.dtype == np.int16:
+        audio_data = audio_data.astype(np.float32) * np.float32(1 / 32768.0)
+
+    n = audio_data.shape[0]
+    if n == 0:
+        return 0.0, 0.0, False
+
+    mean_sq = float(np.dot(audio_data, audio_data)) / n
+
+    zcr = 0.0
+    if n > 1:
+        non_negative = audio_data >= 0
+        zcr = np.count_nonzero(non_negative[1:] ^ non_negative[:-1]) / (n - 1)
+
+    return float(np.sqrt(mean_sq)), zcr, mean_sq > speech_threshold * speech_threshold
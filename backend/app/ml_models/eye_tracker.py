@@ -3,23 +3,65 @@ import numpy as np
 import mediapipe as mp
 from typing import Dict, Optional, Tuple
 import logging
+import math
 import time
 
+from app.ml_models.face_mesh import SharedFaceMesh
+from app.utils.frame_packet import FramePacket
+
 logger = logging.getLogger(__name__)
 
 
+def _gather_pixels_py(points, idx, w, h, out):
+    """
+    Fused gather / truncate / clip of landmark pixel coordinates into an int32 array
+
+    Args:
+        points: (N, 2) float32 landmark pixel coordinates
+        idx: Landmark indices to gather
+        w: Image width
+        h: Image height
+        out: (len(idx), 2) int32 output
+    """
+    for i in range(idx.shape[0]):
+        x = int(points[idx[i], 0])
+        y = int(points[idx[i], 1])
+        out[i, 0] = min(max(x, 0), w - 1)
+        out[i, 1] = min(max(y, 0), h - 1)
+    return out
+
+
+# Numba is optional here - without it the gather falls back to NumPy
+try:
+    from numba import njit
+    _gather_pixels = njit(cache=True, fastmath=True)(_gather_pixels_py)
+except ImportError:
+    def _gather_pixels(points, idx, w, h, out):
+        np.copyto(out, points[idx], casting='unsafe')
+        return np.clip(out, 0, (w - 1, h - 1), out=out)
+
+
 class EyeGazeTracker:
     """
     Tracks eye gaze direction using MediaPipe Face Mesh
     Detects when user is looking away from the screen
     """
 
-    def __init__(self, threshold_seconds: float = 3.0):
+    def __init__(self, threshold_seconds: float = 3.0, face_mesh: Optional[SharedFaceMesh] = None):
+        """
+        Initialize eye gaze tracker
+
+        Args:
+            threshold_seconds: Looking-away time before a violation
+            face_mesh: Face mesh shared with other trackers (a private one is created if omitted)
+        """
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=3,  # Allow tracking up to 3 faces
+        # Gaze only uses the first face (counting faces is FaceDetector's job);
+        # low confidence thresholds for better detection
+        self.face_mesh = face_mesh or SharedFaceMesh(
+            max_num_faces=1,
             refine_landmarks=True,
-            min_detection_confidence=0.3,  # Lower threshold for better detection
+            min_detection_confidence=0.3,
             min_tracking_confidence=0.3
         )
 
@@ -38,6 +80,37 @@ class EyeGazeTracker:
         # Eye landmarks for iris tracking
         self.LEFT_EYE_LANDMARKS = [362, 385, 387, 263, 373, 380]  # Left eye
         self.RIGHT_EYE_LANDMARKS = [33, 160, 158, 133, 153, 144]  # Right eye
+        self._left_eye_idx = np.array(self.LEFT_EYE_LANDMARKS)
+        self._right_eye_idx = np.array(self.RIGHT_EYE_LANDMARKS)
+        self._pose_idx = np.array(self.POSE_LANDMARKS)
+
+        # Integer eye outlines, refilled in place every frame
+        self._left_eye_points = np.empty((len(self.LEFT_EYE_LANDMARKS), 2), dtype=np.int32)
+        self._right_eye_points = np.empty((len(self.RIGHT_EYE_LANDMARKS), 2), dtype=np.int32)
+        # Compile the gather now rather than on the first tracked face
+        _gather_pixels(np.zeros((478, 2), dtype=np.float32), self._left_eye_idx, 1, 1, self._left_eye_points)
+
+        # Camera intrinsics approximation, rebuilt only when the frame size changes
+        self._camera_size = None
+        self._camera_matrix = None
+        self._dist_coeffs = np.zeros((4, 1))  # Assume no lens distortion
+
+        # SQPnP solves the 6-point pose globally in closed form (OpenCV >= 4.5.3);
+        # EPnP is the non-iterative fallback on older builds. Warm-starting
+        # SOLVEPNP_ITERATIVE from the previous frame's pose was measured to be
+        # slower than SQPnP here, and can lock onto a wrong pose after a fast turn
+        self._pnp_flags = getattr(cv2, 'SOLVEPNP_SQPNP', cv2.SOLVEPNP_EPNP)
+
+        # Pupil mask morphology (Proctoring-AI: 9x9 erode x2, 9x9 dilate x4).
+        # Iterating a square SE n times equals one pass with a (n*8+1) square SE,
+        # so each op is done once with the composed kernel
+        self._erode_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (17, 17))
+        self._dilate_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (33, 33))
+
+        # Dark-pupil threshold as a lookup table: THRESH_BINARY_INV at 70 maps
+        # values <= 70 to 255 and everything brighter to 0
+        self.PUPIL_THRESHOLD = 70
+        self._pupil_lut = np.where(np.arange(256) <= self.PUPIL_THRESHOLD, 255, 0).astype(np.uint8)
 
         # 3D model points for head pose estimation
         self.model_points = np.array([
@@ -62,50 +135,43 @@ class EyeGazeTracker:
         self.neutral_yaw = 0.0
         self.neutral_roll = 0.0
         self.is_calibrated = False
-        self.calibration_frames = []
         self.calibration_frame_count = 10  # Calibrate using first 10 frames
+        self.calibration_frames = np.empty((self.calibration_frame_count, 3), dtype=np.float32)  # (pitch, yaw, roll) rows
+        self.calibration_count = 0
+
+        # Temporal caching - reuse the last result while the scene is (nearly) static
+        self.SKIP_FRAMES = 3  # Max consecutive frames served from the cache
+        self.MOTION_THRESHOLD = 2.0  # Mean abs diff (0-255) of a 32x32 thumbnail
+        self._skip_counter = 0
+        self._last_result = None
+        self._last_thumb = None  # Thumbnail of the last fully processed frame
+        self._thumb = np.empty((32, 32), dtype=np.uint8)
 
         logger.info(f"EyeGazeTracker initialized with threshold: {threshold_seconds}s")
 
-    def detect_iris_position(self, landmarks, image, image_shape) -> Optional[Dict]:
+    def detect_iris_position(self, points: np.ndarray, packet: FramePacket) -> Optional[Dict]:
         """
         Detect iris position to determine gaze direction (Proctoring-AI method)
         Uses contour detection on eye region to find pupil/iris position
 
         Args:
-            landmarks: MediaPipe face landmarks
-            image: Original BGR image
-            image_shape: Shape of the image
+            points: Face landmarks as (N, 2) pixel coordinates (see _landmarks_to_np)
+            packet: Current frame (its shared grayscale conversion is used)
 
         Returns:
             Dictionary with gaze information or None
         """
         try:
-            h, w = image_shape[:2]
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-            # Get left eye region
-            left_eye_points = []
-            for idx in self.LEFT_EYE_LANDMARKS:
-                if idx < len(landmarks):
-                    x = int(landmarks[idx].x * w)
-                    y = int(landmarks[idx].y * h)
-                    left_eye_points.append((x, y))
-
-            # Get right eye region
-            right_eye_points = []
-            for idx in self.RIGHT_EYE_LANDMARKS:
-                if idx < len(landmarks):
-                    x = int(landmarks[idx].x * w)
-                    y = int(landmarks[idx].y * h)
-                    right_eye_points.append((x, y))
-
-            if len(left_eye_points) < 4 or len(right_eye_points) < 4:
-                return None
+            h, w = packet.shape[:2]
+            gray = packet.gray
+
+            # Gather each eye outline from the shared landmark array as in-frame int pixels
+            left_eye_points = _gather_pixels(points, self._left_eye_idx, w, h, self._left_eye_points)
+            right_eye_points = _gather_pixels(points, self._right_eye_idx, w, h, self._right_eye_points)
 
             # Analyze each eye
-            left_gaze = self._analyze_eye_region(gray, np.array(left_eye_points))
-            right_gaze = self._analyze_eye_region(gray, np.array(right_eye_points))
+            left_gaze = self._analyze_eye_region(gray, left_eye_points)
+            right_gaze = self._analyze_eye_region(gray, right_eye_points)
 
             # Combine results from both eyes - they should agree
             if left_gaze is not None and right_gaze is not None:
@@ -139,6 +205,30 @@ class EyeGazeTracker:
             logger.error(f"Iris position detection failed: {e}")
             return None
 
+    @staticmethod
+    def _landmarks_to_np(landmarks, w: int, h: int) -> np.ndarray:
+        """
+        Convert face landmarks to a (N, 2) float32 array in pixel coordinates
+
+        The protobuf list is walked once per frame; iris tracking and head
+        pose then index the array instead of the landmark objects.
+
+        Args:
+            landmarks: MediaPipe face landmarks
+            w: Image width
+            h: Image height
+
+        Returns:
+            Landmark (x, y) pixel coordinates
+        """
+        points = np.fromiter(
+            (v for lm in landmarks for v in (lm.x, lm.y)),
+            dtype=np.float32,
+            count=len(landmarks) * 2
+        ).reshape(-1, 2)
+        points *= np.array((w, h), dtype=np.float32)
+        return points
+
     def _analyze_eye_region(self, gray_image, eye_points) -> Optional[Dict]:
         """
         Analyze eye region to find iris/pupil position using Proctoring-AI method
@@ -151,63 +241,53 @@ class EyeGazeTracker:
             Dict with horizontal and vertical ratios
         """
         try:
-            # Create mask for eye region
-            mask = np.zeros(gray_image.shape, dtype=np.uint8)
-            cv2.fillConvexPoly(mask, eye_points, 255)
-
-            # Extract eye region
-            eye_region = cv2.bitwise_and(gray_image, gray_image, mask=mask)
-
             # Get bounding box
             x, y, w, h = cv2.boundingRect(eye_points)
             if w == 0 or h == 0:
                 return None
 
-            # Find extreme points for ratio calculation (Proctoring-AI method)
-            # eye_points is already a 2D array of (x, y) coordinates
-            left_point = tuple(eye_points[eye_points[:, 0].argmin()])
-            right_point = tuple(eye_points[eye_points[:, 0].argmax()])
-            top_point = tuple(eye_points[eye_points[:, 1].argmin()])
-            bottom_point = tuple(eye_points[eye_points[:, 1].argmax()])
-
-            eye_crop = eye_region[y:y+h, x:x+w]
+            # Work on the eye ROI only (a few hundred pixels instead of the whole frame)
+            x, y = max(x, 0), max(y, 0)
+            eye_crop = gray_image[y:y+h, x:x+w]
+            if eye_crop.size == 0:
+                return None
 
-            # Threshold to find dark pupil (adjustable, default 70)
-            _, thresh = cv2.threshold(eye_crop, 70, 255, cv2.THRESH_BINARY_INV)
+            # Mask the eye outline within the ROI
+            mask = np.zeros(eye_crop.shape, dtype=np.uint8)
+            cv2.fillConvexPoly(mask, eye_points - (x, y), 255)
+            eye_crop = cv2.bitwise_and(eye_crop, eye_crop, mask=mask)
 
-            # AGGRESSIVE PREPROCESSING (Proctoring-AI method)
-            # Kernel for morphological operations
-            kernel = np.ones((9, 9), np.uint8)
+            # Extreme coordinates for ratio calculation (Proctoring-AI method)
+            # The ratio formula only uses the min/max x and y of the eye outline
+            left_x, top_y = eye_points.min(axis=0).tolist()
+            right_x, bottom_y = eye_points.max(axis=0).tolist()
 
-            # Erosion (2 iterations)
-            thresh = cv2.erode(thresh, kernel, iterations=2)
+            # Threshold to find dark pupil (adjustable via PUPIL_THRESHOLD, default 70)
+            thresh = cv2.LUT(eye_crop, self._pupil_lut)
 
-            # Dilation (4 iterations)
-            thresh = cv2.dilate(thresh, kernel, iterations=4)
+            # AGGRESSIVE PREPROCESSING (Proctoring-AI method)
+            # Erosion (9x9, 2 iterations == 17x17 once)
+            thresh = cv2.erode(thresh, self._erode_kernel)
 
-            # Median blur for noise reduction
-            thresh = cv2.medianBlur(thresh, 3)
+            # Dilation (9x9, 4 iterations == 33x33 once)
+            thresh = cv2.dilate(thresh, self._dilate_kernel)
 
             # Bitwise NOT
             thresh = cv2.bitwise_not(thresh)
 
-            # Find contours
-            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Label blobs; areas and centroids come back from the same pass
+            num_labels, _, stats, centroids = cv2.connectedComponentsWithStats(thresh, connectivity=8)
 
-            if not contours:
+            # Label 0 is the background
+            if num_labels < 2:
                 return None
 
-            # Get largest contour (iris/pupil)
-            largest_contour = max(contours, key=cv2.contourArea)
-
-            # Calculate moments to get centroid
-            M = cv2.moments(largest_contour)
-            if M['m00'] == 0:
-                return None
+            # Largest blob (iris/pupil)
+            largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
 
             # Centroid in cropped coordinates
-            cx_crop = int(M['m10'] / M['m00'])
-            cy_crop = int(M['m01'] / M['m00'])
+            cx_crop = int(centroids[largest, 0])
+            cy_crop = int(centroids[largest, 1])
 
             # Convert to full image coordinates
             cx = cx_crop + x
@@ -217,11 +297,6 @@ class EyeGazeTracker:
             # x_ratio = (left - cx) / (cx - right)
             # y_ratio = (cy - top) / (bottom - cy)
 
-            left_x, left_y = left_point
-            right_x, right_y = right_point
-            top_x, top_y = top_point
-            bottom_x, bottom_y = bottom_point
-
             # Avoid division by zero
             denominator_x = (cx - right_x)
             denominator_y = (bottom_y - cy)
@@ -273,12 +348,12 @@ class EyeGazeTracker:
 
         return 'center'
 
-    def estimate_head_pose(self, landmarks, image_shape) -> Optional[Tuple[float, float, float]]:
+    def estimate_head_pose(self, points: np.ndarray, image_shape) -> Optional[Tuple[float, float, float]]:
         """
         Estimate head pose using solvePnP (production-proven method)
 
         Args:
-            landmarks: MediaPipe face landmarks
+            points: Face landmarks as (N, 2) pixel coordinates (see _landmarks_to_np)
             image_shape: Shape of the image (height, width)
 
         Returns:
@@ -286,51 +361,43 @@ class EyeGazeTracker:
         """
         h, w = image_shape[:2]
 
-        # Extract 2D image points from landmarks
-        image_points = np.array([
-            (landmarks[self.POSE_LANDMARKS[0]].x * w, landmarks[self.POSE_LANDMARKS[0]].y * h),  # Nose tip
-            (landmarks[self.POSE_LANDMARKS[1]].x * w, landmarks[self.POSE_LANDMARKS[1]].y * h),  # Chin
-            (landmarks[self.POSE_LANDMARKS[2]].x * w, landmarks[self.POSE_LANDMARKS[2]].y * h),  # Left eye
-            (landmarks[self.POSE_LANDMARKS[3]].x * w, landmarks[self.POSE_LANDMARKS[3]].y * h),  # Right eye
-            (landmarks[self.POSE_LANDMARKS[4]].x * w, landmarks[self.POSE_LANDMARKS[4]].y * h),  # Left mouth
-            (landmarks[self.POSE_LANDMARKS[5]].x * w, landmarks[self.POSE_LANDMARKS[5]].y * h)   # Right mouth
-        ], dtype="double")
+        # 2D image points (nose tip, chin, eye corners, mouth corners) in one gather
+        # (fancy indexing + astype yields a fresh contiguous float64 array)
+        image_points = points[self._pose_idx].astype(np.float64)
 
         # Camera internals (approximation)
-        focal_length = w
-        center = (w / 2, h / 2)
-        camera_matrix = np.array([
-            [focal_length, 0, center[0]],
-            [0, focal_length, center[1]],
-            [0, 0, 1]
-        ], dtype="double")
-
-        # Assume no lens distortion
-        dist_coeffs = np.zeros((4, 1))
+        if self._camera_size != (w, h):
+            focal_length = w
+            center = (w / 2, h / 2)
+            self._camera_matrix = np.array([
+                [focal_length, 0, center[0]],
+                [0, focal_length, center[1]],
+                [0, 0, 1]
+            ], dtype="double")
+            self._camera_size = (w, h)
 
         try:
             # Solve for pose
             success, rotation_vec, translation_vec = cv2.solvePnP(
                 self.model_points,
                 image_points,
-                camera_matrix,
-                dist_coeffs,
-                flags=cv2.SOLVEPNP_ITERATIVE
+                self._camera_matrix,
+                self._dist_coeffs,
+                flags=self._pnp_flags
             )
 
             if not success:
                 return None
 
             # Convert rotation vector to rotation matrix
-            rotation_mat, _ = cv2.Rodrigues(rotation_vec)
-
-            # Extract Euler angles
-            pose_mat = cv2.hconcat((rotation_mat, translation_vec))
-            _, _, _, _, _, _, euler_angles = cv2.decomposeProjectionMatrix(pose_mat)
+            R, _ = cv2.Rodrigues(rotation_vec)
 
-            pitch = euler_angles[0][0]
-            yaw = euler_angles[1][0]
-            roll = euler_angles[2][0]
+            # Extract Euler angles straight from the rotation matrix (same angles
+            # decomposeProjectionMatrix returns, without its RQ decomposition)
+            sy = math.sqrt(R[0, 0] * R[0, 0] + R[1, 0] * R[1, 0])
+            pitch = math.degrees(math.atan2(R[2, 1], R[2, 2]))
+            yaw = math.degrees(math.atan2(-R[2, 0], sy))
+            roll = math.degrees(math.atan2(R[1, 0], R[0, 0]))
 
             return pitch, yaw, roll
 
@@ -347,19 +414,16 @@ class EyeGazeTracker:
             yaw: Current yaw angle
             roll: Current roll angle
         """
-        if len(self.calibration_frames) < self.calibration_frame_count:
-            self.calibration_frames.append((pitch, yaw, roll))
-            logger.debug(f"Calibration frame {len(self.calibration_frames)}/{self.calibration_frame_count}")
-
-            if len(self.calibration_frames) == self.calibration_frame_count:
-                # Calculate average neutral position
-                pitches = [p for p, y, r in self.calibration_frames]
-                yaws = [y for p, y, r in self.calibration_frames]
-                rolls = [r for p, y, r in self.calibration_frames]
-
-                self.neutral_pitch = np.median(pitches)
-                self.neutral_yaw = np.median(yaws)
-                self.neutral_roll = np.median(rolls)
+        if self.calibration_count < self.calibration_frame_count:
+            self.calibration_frames[self.calibration_count] = (pitch, yaw, roll)
+            self.calibration_count += 1
+            logger.debug(f"Calibration frame {self.calibration_count}/{self.calibration_frame_count}")
+
+            if self.calibration_count == self.calibration_frame_count:
+                # Calculate neutral position (per-angle median in one call)
+                self.neutral_pitch, self.neutral_yaw, self.neutral_roll = (
+                    np.median(self.calibration_frames, axis=0).tolist()
+                )
                 self.is_calibrated = True
 
                 logger.info(f"Calibration complete - Neutral position: "
@@ -400,21 +464,50 @@ class EyeGazeTracker:
 
         return False, "center"
 
-    def track_gaze(self, image: np.ndarray) -> Dict:
+    def track_gaze(self, packet: FramePacket, now: Optional[float] = None) -> Dict:
         """
         Track eye gaze using head pose estimation (production-proven method)
 
         Args:
-            image: BGR image from OpenCV
+            packet: Current frame with its shared colour conversions
+            now: time.monotonic() reading for this frame (read here if not given)
 
         Returns:
             Dictionary with gaze tracking results
         """
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        current_time = time.monotonic() if now is None else now
+
+        # Cheap motion check against the last fully processed frame
+        cv2.resize(packet.gray, (32, 32), dst=self._thumb, interpolation=cv2.INTER_AREA)
+        if self._last_result is not None and self._skip_counter < self.SKIP_FRAMES:
+            motion = cv2.sumElems(cv2.absdiff(self._thumb, self._last_thumb))[0] / self._thumb.size
+            if motion < self.MOTION_THRESHOLD:
+                self._skip_counter += 1
+                return self._cached_result(current_time)
+
+        self._skip_counter = 0
+        self._last_thumb = self._thumb.copy()
+        self._last_result = self._track_gaze(packet, current_time)
+        return self._last_result
+
+    def _cached_result(self, current_time: float) -> Dict:
+        """Last gaze result with looking-away timing brought up to date"""
+        result = dict(self._last_result)
+
+        if self.looking_away_start is not None:
+            duration = current_time - self.looking_away_start
+            violation = duration > self.threshold_seconds
+            result['duration'] = duration
+            result['violation'] = violation
+            result['alert_type'] = 'eyes_looking_away' if violation else None
+
+        return result
 
-        # Process the image
-        results = self.face_mesh.process(image_rgb)
+    def _track_gaze(self, packet: FramePacket, current_time: float) -> Dict:
+        """Run the full face mesh + iris + head pose pipeline on a frame"""
+        # Process the downscaled image (landmarks are normalized, so no remapping is needed);
+        # reuses the landmarks if another tracker already ran the mesh on this frame
+        results = self.face_mesh.process_once(packet.rgb_small, packet.frame_id)
 
         if not results.multi_face_landmarks:
             # No face detected
@@ -430,14 +523,15 @@ class EyeGazeTracker:
                 'roll': 0
             }
 
-        # Get the first face
-        face_landmarks = results.multi_face_landmarks[0].landmark
+        # Get the first face, converted once to pixel coordinates for both methods
+        h, w = packet.shape[:2]
+        points = self._landmarks_to_np(results.multi_face_landmarks[0].landmark, w, h)
 
         # Method 1: Iris-based eye tracking (Proctoring-AI method - more accurate for eye movement)
-        iris_result = self.detect_iris_position(face_landmarks, image, image.shape)
+        iris_result = self.detect_iris_position(points, packet)
 
         # Method 2: Head pose estimation (for head turns)
-        pose_result = self.estimate_head_pose(face_landmarks, image.shape)
+        pose_result = self.estimate_head_pose(points, packet.shape)
 
         # Default values
         looking_away = False
@@ -448,8 +542,9 @@ class EyeGazeTracker:
         if iris_result is not None:
             looking_away = iris_result['looking_away']
             gaze_direction = iris_result['direction']
-            logger.debug(f"Iris tracking - x_ratio: {iris_result['x_ratio']:.2f}, "
-                        f"y_ratio: {iris_result['y_ratio']:.2f}, Direction: {gaze_direction}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Iris tracking - x_ratio: {iris_result['x_ratio']:.2f}, "
+                            f"y_ratio: {iris_result['y_ratio']:.2f}, Direction: {gaze_direction}")
 
         # Fall back to or combine with head pose
         if pose_result is not None:
@@ -467,8 +562,7 @@ class EyeGazeTracker:
                 looking_away = head_looking_away
                 gaze_direction = head_direction
 
-        # Track duration of looking away
-        current_time = time.time()
+        # Track duration of looking away (monotonic, immune to wall-clock jumps)
         if looking_away:
             if self.looking_away_start is None:
                 self.looking_away_start = current_time
@@ -482,9 +576,10 @@ class EyeGazeTracker:
         # Check if violation threshold is exceeded
         violation = duration > self.threshold_seconds
 
-        # Log for debugging
-        logger.debug(f"Head pose - Pitch: {pitch:.1f}, Yaw: {yaw:.1f}, Roll: {roll:.1f} | "
-                    f"Looking away: {looking_away} ({gaze_direction}) | Duration: {duration:.1f}s")
+        # Log for debugging (guarded: runs every frame)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Head pose - Pitch: {pitch:.1f}, Yaw: {yaw:.1f}, Roll: {roll:.1f} | "
+                        f"Looking away: {looking_away} ({gaze_direction}) | Duration: {duration:.1f}s")
 
         return {
             'face_detected': True,
@@ -499,11 +594,19 @@ class EyeGazeTracker:
             'total_away_time': self.total_looking_away_time
         }
 
-    def draw_gaze_info(self, image: np.ndarray, gaze_data: Dict) -> np.ndarray:
+    def draw_gaze_info(self, image: np.ndarray, gaze_data: Dict, inplace: bool = True) -> np.ndarray:
         """
         Draw gaze tracking information on the image with head pose data
+
+        Args:
+            image: BGR image from OpenCV
+            gaze_data: Result of track_gaze()
+            inplace: Draw directly on image (pass False to draw on a copy)
+
+        Returns:
+            Image with the gaze overlay
         """
-        output = image.copy()
+        output = image if inplace else image.copy()
 
         if not gaze_data['face_detected']:
             cv2.putText(output, "No face detected", (10, 30),
@@ -542,10 +645,8 @@ class EyeGazeTracker:
         self.looking_away_start = None
         self.total_looking_away_time = 0
         self.is_calibrated = False
-        self.calibration_frames = []
+        self.calibration_count = 0
+        self._skip_counter = 0
+        self._last_result = None
+        self._last_thumb = None
         logger.info("Eye tracker reset - will recalibrate on next session")
-
-    def __del__(self):
-        """Cleanup resources"""
-        if hasattr(self, 'face_mesh'):
-            self.face_mesh.close()
@@ -1,9 +1,12 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Optional
 import logging
 
+from app.ml_models.face_mesh import SharedFaceMesh
+from app.utils.frame_packet import FramePacket
+
 logger = logging.getLogger(__name__)
 
 
@@ -12,7 +15,13 @@ class FaceDetector:
     Detects faces and facial landmarks using MediaPipe
     """
 
-    def __init__(self):
+    def __init__(self, face_mesh: Optional[SharedFaceMesh] = None):
+        """
+        Initialize face detector
+
+        Args:
+            face_mesh: Face mesh shared with other trackers (a private one is created if omitted)
+        """
         self.mp_face_detection = mp.solutions.face_detection
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_drawing = mp.solutions.drawing_utils
@@ -23,90 +32,97 @@ class FaceDetector:
             min_detection_confidence=0.5
         )
 
-        # Initialize face mesh for detailed landmarks
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
+        # Face mesh for detailed landmarks
+        self.face_mesh = face_mesh or SharedFaceMesh(
             max_num_faces=3,
             refine_landmarks=True,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
 
+        # Warm up the detection graph so the first real frame doesn't stall
+        dummy = np.zeros((360, 640, 3), dtype=np.uint8)
+        try:
+            for _ in range(3):
+                self.face_detection.process(dummy)
+        except Exception as e:
+            logger.warning(f"FaceDetection warm-up failed: {e}")
+
         logger.info("FaceDetector initialized")
 
-    def detect_faces(self, image: np.ndarray) -> Tuple[int, List[Dict]]:
+    def detect_faces(self, packet: FramePacket) -> Dict:
         """
         Detect faces in the image
 
         Args:
-            image: BGR image from OpenCV
+            packet: Current frame with its shared colour conversions
 
         Returns:
-            Tuple of (number_of_faces, list of face data)
+            Faces as parallel arrays: {'bboxes': int32 (N, 4) of [x, y, width, height],
+            'confidences': float32 (N,), 'count': N}
         """
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # BlazeFace runs at 192x192 internally and returns relative boxes, so the
+        # downscaled input (resized in BGR, then converted) loses nothing
+        results = self.face_detection.process(packet.rgb_small)
 
-        # Process the image
-        results = self.face_detection.process(image_rgb)
+        detections = results.detections or []
+        num_faces = len(detections)
 
-        faces = []
-        num_faces = 0
+        bboxes = np.empty((num_faces, 4), dtype=np.int32)
+        confidences = np.empty(num_faces, dtype=np.float32)
 
-        if results.detections:
-            num_faces = len(results.detections)
+        if num_faces:
+            ih, iw = packet.shape[:2]
+            relative = np.empty((num_faces, 4), dtype=np.float32)
 
-            for detection in results.detections:
+            for i, detection in enumerate(detections):
                 # Get bounding box
                 bboxC = detection.location_data.relative_bounding_box
-                ih, iw, _ = image.shape
+                relative[i] = (bboxC.xmin, bboxC.ymin, bboxC.width, bboxC.height)
+                confidences[i] = detection.score[0]
 
-                bbox = {
-                    'x': int(bboxC.xmin * iw),
-                    'y': int(bboxC.ymin * ih),
-                    'width': int(bboxC.width * iw),
-                    'height': int(bboxC.height * ih)
-                }
+            # Scale all boxes to pixels at once (truncated like int())
+            relative *= np.array((iw, ih, iw, ih), dtype=np.float32)
+            bboxes[:] = relative
 
-                faces.append({
-                    'bbox': bbox,
-                    'confidence': detection.score[0]
-                })
-
-        return num_faces, faces
+        return {
+            'bboxes': bboxes,
+            'confidences': confidences,
+            'count': num_faces
+        }
 
-    def get_face_landmarks(self, image: np.ndarray) -> Optional[List]:
+    def get_face_landmarks(self, packet: FramePacket) -> Optional[List]:
         """
         Get detailed face landmarks for eye tracking and head pose
 
         Args:
-            image: BGR image from OpenCV
+            packet: Current frame with its shared colour conversions
 
         Returns:
             List of landmark data or None
         """
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-        # Process the image
-        results = self.face_mesh.process(image_rgb)
+        # Process the downscaled image (same input as the eye tracker, so the
+        # landmarks are reused if it already ran the mesh on this frame)
+        results = self.face_mesh.process_once(packet.rgb_small, packet.frame_id)
 
         if results.multi_face_landmarks:
             return results.multi_face_landmarks
 
         return None
 
-    def check_multiple_faces(self, image: np.ndarray, max_allowed: int = 1) -> Dict:
+    def check_multiple_faces(self, packet: FramePacket, max_allowed: int = 1) -> Dict:
         """
         Check if there are multiple faces in the frame
 
         Args:
-            image: BGR image from OpenCV
+            packet: Current frame with its shared colour conversions
             max_allowed: Maximum number of faces allowed
 
         Returns:
             Dictionary with violation status and details
         """
-        num_faces, faces = self.detect_faces(image)
+        faces = self.detect_faces(packet)
+        num_faces = faces['count']
 
         violation = num_faces > max_allowed
 
@@ -118,28 +134,26 @@ class FaceDetector:
             'alert_type': 'multiple_persons' if violation else None
         }
 
-    def draw_faces(self, image: np.ndarray, faces: List[Dict]) -> np.ndarray:
+    def draw_faces(self, image: np.ndarray, faces: Dict, inplace: bool = True) -> np.ndarray:
         """
         Draw bounding boxes around detected faces
 
         Args:
             image: BGR image from OpenCV
-            faces: List of face data
+            faces: Face arrays returned by detect_faces()
+            inplace: Draw directly on image (pass False to draw on a copy)
 
         Returns:
             Image with drawn faces
         """
-        output = image.copy()
-
-        for face in faces:
-            bbox = face['bbox']
-            confidence = face['confidence']
+        output = image if inplace else image.copy()
 
+        for (x, y, width, height), confidence in zip(faces['bboxes'].tolist(), faces['confidences'].tolist()):
             # Draw rectangle
             cv2.rectangle(
                 output,
-                (bbox['x'], bbox['y']),
-                (bbox['x'] + bbox['width'], bbox['y'] + bbox['height']),
+                (x, y),
+                (x + width, y + height),
                 (0, 255, 0),
                 2
             )
@@ -148,7 +162,7 @@ class FaceDetector:
             cv2.putText(
                 output,
                 f"{confidence:.2f}",
-                (bbox['x'], bbox['y'] - 10),
+                (x, y - 10),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
                 (0, 255, 0),
@@ -158,8 +172,6 @@ class FaceDetector:
         return output
 
     def __del__(self):
-        """Cleanup resources"""
+        """Cleanup resources (the face mesh is closed by its owner)"""
         if hasattr(self, 'face_detection'):
             self.face_detection.close()
-        if hasattr(self, 'face_mesh'):
-            self.face_mesh.close()
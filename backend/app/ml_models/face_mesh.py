@@ -0,0 +1,85 @@
+import mediapipe as mp
+import numpy as np
+from typing import Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SharedFaceMesh:
+    """
+    One MediaPipe FaceMesh graph shared by the trackers of a session
+
+    EyeGazeTracker and FaceDetector both need face landmarks for the same
+    frame; process_once() memoizes the last result by frame id, so only the
+    first caller per frame runs the landmark model.
+    """
+
+    def __init__(
+        self,
+        max_num_faces: int = 3,
+        refine_landmarks: bool = True,
+        min_detection_confidence: float = 0.3,
+        min_tracking_confidence: float = 0.3
+    ):
+        """
+        Initialize the shared face mesh
+
+        Args:
+            max_num_faces: Maximum number of faces to track
+            refine_landmarks: Also predict iris landmarks
+            min_detection_confidence: Face detection confidence threshold
+            min_tracking_confidence: Landmark tracking confidence threshold
+        """
+        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+            max_num_faces=max_num_faces,
+            refine_landmarks=refine_landmarks,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+
+        self._last_frame_id: Optional[int] = None
+        self._last_results: Any = None
+
+        # Pay the graph/op initialization cost now rather than on the first real frame
+        self.warmup()
+
+        logger.debug(f"SharedFaceMesh initialized (max_num_faces={max_num_faces})")
+
+    def process_once(self, rgb: np.ndarray, frame_id: Optional[int] = None) -> Any:
+        """
+        Run the face mesh on a frame, reusing the result if this frame was already processed
+
+        Args:
+            rgb: RGB image
+            frame_id: Id of the frame (None always runs the model)
+
+        Returns:
+            MediaPipe FaceMesh results
+        """
+        if frame_id is not None and frame_id == self._last_frame_id:
+            return self._last_results
+
+        results = self.face_mesh.process(rgb)
+        self._last_frame_id = frame_id
+        self._last_results = results
+        return results
+
+    def warmup(self, iterations: int = 3):
+        """
+        Run the graph on blank frames so the first real frame runs at steady-state speed
+
+        Args:
+            iterations: Number of warm-up passes
+        """
+        dummy = np.zeros((360, 640, 3), dtype=np.uint8)
+        try:
+            for _ in range(iterations):
+                self.face_mesh.process(dummy)
+        except Exception as e:
+            logger.warning(f"FaceMesh warm-up failed: {e}")
+
+    def close(self):
+        """Release the MediaPipe graph"""
+        self.face_mesh.close()
+        self._last_results = None
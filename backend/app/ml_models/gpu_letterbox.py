@@ -0,0 +1,130 @@
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# CuPy compiles and launches the kernel; it is optional and only ever used
+# together with the TensorRT backend (which already requires a CUDA GPU)
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
+
+# Bilinear resize (cv2.INTER_LINEAR pixel-centre convention) + grey padding +
+# BGR->RGB + HWC->CHW + /255, one thread per output pixel
+_KERNEL_SOURCE = r"""
+#include <cuda_fp16.h>
+
+template <typename T>
+__device__ __forceinline__ T to_out(float v);
+template <>
+__device__ __forceinline__ float to_out<float>(float v) { return v; }
+template <>
+__device__ __forceinline__ __half to_out<__half>(float v) { return __float2half(v); }
+
+template <typename T>
+__global__ void letterbox(
+    const unsigned char* __restrict__ src, int src_h, int src_w,
+    T* __restrict__ dst, int size,
+    int new_h, int new_w, int pad_y, int pad_x)
+{
+    int x = blockIdx.x * blockDim.x + threadIdx.x;
+    int y = blockIdx.y * blockDim.y + threadIdx.y;
+    if (x >= size || y >= size) return;
+
+    float b = 114.0f, g = 114.0f, r = 114.0f;
+    int ix = x - pad_x;
+    int iy = y - pad_y;
+    if (ix >= 0 && ix < new_w && iy >= 0 && iy < new_h) {
+        float sx = fmaxf((ix + 0.5f) * ((float)src_w / new_w) - 0.5f, 0.0f);
+        float sy = fmaxf((iy + 0.5f) * ((float)src_h / new_h) - 0.5f, 0.0f);
+        int x0 = min((int)sx, src_w - 1);
+        int y0 = min((int)sy, src_h - 1);
+        int x1 = min(x0 + 1, src_w - 1);
+        int y1 = min(y0 + 1, src_h - 1);
+        float fx = sx - x0;
+        float fy = sy - y0;
+
+        const unsigned char* p00 = src + (y0 * src_w + x0) * 3;
+        const unsigned char* p01 = src + (y0 * src_w + x1) * 3;
+        const unsigned char* p10 = src + (y1 * src_w + x0) * 3;
+        const unsigned char* p11 = src + (y1 * src_w + x1) * 3;
+        float w00 = (1.0f - fx) * (1.0f - fy), w01 = fx * (1.0f - fy);
+        float w10 = (1.0f - fx) * fy, w11 = fx * fy;
+
+        b = w00 * p00[0] + w01 * p01[0] + w10 * p10[0] + w11 * p11[0];
+        g = w00 * p00[1] + w01 * p01[1] + w10 * p10[1] + w11 * p11[1];
+        r = w00 * p00[2] + w01 * p01[2] + w10 * p10[2] + w11 * p11[2];
+    }
+
+    const float norm = 1.0f / 255.0f;
+    int plane = size * size;
+    int o = y * size + x;
+    dst[o] = to_out<T>(r * norm);
+    dst[plane + o] = to_out<T>(g * norm);
+    dst[2 * plane + o] = to_out<T>(b * norm);
+}
+"""
+
+
+class GpuLetterbox:
+    """
+    Letterboxes BGR frames on the GPU straight into a TensorRT input binding
+
+    Only the raw uint8 frame crosses PCIe; resizing, padding, channel swap,
+    layout change and normalization happen in one kernel that writes the
+    model's device input buffer, so no host-side float tensor is built and
+    no H2D copy of the 640x640 input is needed.
+    """
+
+    BLOCK = (16, 16, 1)
+
+    def __init__(self, input_ptr: int, input_shape, dtype, stream_handle: int):
+        """
+        Compile the kernel for the engine's input
+
+        Args:
+            input_ptr: Device address of the (B, 3, S, S) input binding
+            input_shape: Shape of the input binding
+            dtype: Input dtype (float16 or float32)
+            stream_handle: CUDA stream the engine runs on (kernels are queued on it)
+        """
+        self.input_ptr = input_ptr
+        self.size = input_shape[-1]
+        self.dtype = np.dtype(dtype)
+        self.image_bytes = int(np.prod(input_shape[1:])) * self.dtype.itemsize
+
+        name = 'letterbox<__half>' if self.dtype == np.float16 else 'letterbox<float>'
+        module = cp.RawModule(code=_KERNEL_SOURCE, options=('-std=c++14',), name_expressions=[name])
+        self._kernel = module.get_function(name)
+        self._stream = cp.cuda.ExternalStream(stream_handle)
+
+        # Device copy of the incoming frame, grown when a bigger frame arrives
+        self._src = None
+
+        logger.info(f"GPU letterboxing enabled ({self.dtype.name} input)")
+
+    def __call__(self, image: np.ndarray, index: int, new_w: int, new_h: int, pad_x: int, pad_y: int):
+        """
+        Queue upload + letterbox of one frame into slot index of the input binding
+
+        Args:
+            image: BGR image from OpenCV
+            index: Batch slot to write
+            new_w, new_h: Size of the resized frame inside the square input
+            pad_x, pad_y: Offset of the resized frame
+        """
+        h, w = image.shape[:2]
+        with self._stream:
+            if self._src is None or self._src.size < image.size:
+                self._src = cp.empty(image.size, dtype=cp.uint8)
+            # Stream-ordered, so a previous frame's kernel has consumed the buffer first
+            self._src[:image.size].set(np.ascontiguousarray(image).reshape(-1), stream=self._stream)
+
+            grid = ((self.size + self.BLOCK[0] - 1) // self.BLOCK[0], (self.size + self.BLOCK[1] - 1) // self.BLOCK[1], 1)
+            self._kernel(grid, self.BLOCK, (
+                self._src, np.int32(h), np.int32(w),
+                np.uint64(self.input_ptr + index * self.image_bytes), np.int32(self.size),
+                np.int32(new_h), np.int32(new_w), np.int32(pad_y), np.int32(pad_x)
+            ))
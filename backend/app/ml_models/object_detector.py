@@ -1,34 +1,194 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from typing import List, Dict, Tuple
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
+# ONNX Runtime runs an exported model (python -m app.ml_models._yolo_export)
+# without PyTorch/ultralytics on the per-frame path; both are optional
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+# OpenVINO IR models (python -m app.ml_models._yolo_export --openvino) for CPU-only servers
+try:
+    import openvino as ov
+except ImportError:
+    ov = None
+
+# TensorRT engines (NVIDIA only) run through the TensorRT runtime + PyCUDA
+try:
+    import tensorrt as trt
+    import pycuda.driver as cuda
+except ImportError:
+    trt = None
+
+try:
+    from ultralytics import YOLO
+except ImportError:
+    YOLO = None
+
+from app.ml_models import gpu_letterbox
+
+# One row per detection; dicts are only built for the few rows that get reported
+DETECTION_DTYPE = np.dtype([
+    ('class_id', 'i4'), ('conf', 'f4'),
+    ('x1', 'i4'), ('y1', 'i4'), ('x2', 'i4'), ('y2', 'i4'),
+    ('prio', 'u1'),
+])
+
+# Values of the prio field
+PRIORITY_NAMES = ('critical', 'high', 'medium')
+
+
+def _letterbox_chw_py(src, dst, new_w, new_h, pad_x, pad_y):
+    """
+    Fused bilinear resize / grey padding / BGR->RGB / HWC->CHW / normalize kernel
+
+    One pass over the (3, S, S) destination instead of resize + pad + transpose
+    + scale as separate steps; rows are independent, so they run in parallel.
+
+    Args:
+        src: (H, W, 3) uint8 BGR frame
+        dst: (3, S, S) float32 model input slice
+        new_w, new_h: Size of the resized frame inside the square input
+        pad_x, pad_y: Offset of the resized frame
+    """
+    src_h, src_w = src.shape[0], src.shape[1]
+    size = dst.shape[1]
+    sx_scale = src_w / new_w
+    sy_scale = src_h / new_h
+    norm = np.float32(1.0 / 255.0)
+    grey = np.float32(114.0 / 255.0)  # ultralytics letterbox grey
+
+    # Source columns and weights only depend on x (cv2.INTER_LINEAR pixel centres)
+    xs0 = np.empty(new_w, np.int64)
+    xs1 = np.empty(new_w, np.int64)
+    fxs = np.empty(new_w, np.float32)
+    for ix in range(new_w):
+        sx = max((ix + 0.5) * sx_scale - 0.5, 0.0)
+        x0 = min(int(sx), src_w - 1)
+        xs0[ix] = x0
+        xs1[ix] = min(x0 + 1, src_w - 1)
+        fxs[ix] = sx - x0
+
+    for y in prange(size):
+        iy = y - pad_y
+        if iy < 0 or iy >= new_h:
+            dst[:, y, :] = grey
+            continue
+        sy = max((iy + 0.5) * sy_scale - 0.5, 0.0)
+        y0 = min(int(sy), src_h - 1)
+        y1 = min(y0 + 1, src_h - 1)
+        fy = np.float32(sy - y0)
+        dst[:, y, :pad_x] = grey
+        dst[:, y, pad_x + new_w:] = grey
+        for ix in range(new_w):
+            x0 = xs0[ix]
+            x1 = xs1[ix]
+            fx = fxs[ix]
+            for c in range(3):
+                top = src[y0, x0, c] + fx * (np.float32(src[y0, x1, c]) - src[y0, x0, c])
+                bottom = src[y1, x0, c] + fx * (np.float32(src[y1, x1, c]) - src[y1, x0, c])
+                dst[2 - c, y, pad_x + ix] = (top + fy * (bottom - top)) * norm
+    return dst
+
+
+# Numba is optional here - without it (and for float16 inputs, which Numba
+# can't write) letterboxing uses cv2.resize + NumPy
+try:
+    from numba import njit, prange
+    _letterbox_chw = njit(parallel=True, fastmath=True, cache=True)(_letterbox_chw_py)
+except ImportError:
+    _letterbox_chw = None
+
+
+def _strip_engine_metadata(data: bytes) -> bytes:
+    """Drop the JSON metadata header ultralytics prepends to exported .engine files"""
+    meta_len = int.from_bytes(data[:4], byteorder='little')
+    try:
+        header = data[4:4 + meta_len].decode('utf-8')
+    except UnicodeDecodeError:
+        return data
+    return data[4 + meta_len:] if header.startswith('{') else data
+
+
+@dataclass
+class _TensorRTSlot:
+    """One TensorRT execution context with its own CUDA stream and buffers"""
+    context: object
+    stream: object
+    input: np.ndarray  # Page-locked host buffers
+    output: np.ndarray
+    d_input: object
+    d_output: object
+    device_buffers: list
+    gpu_letterbox: Optional[object] = None
+    busy: bool = False  # Submitted and not gathered yet
+
 
 class ObjectDetector:
     """
     Detects phones and other prohibited objects using YOLO
     """
 
-    def __init__(self, model_path: str = None, confidence_threshold: float = 0.5):
+    # Exported model input size and NMS IoU (ultralytics defaults)
+    INPUT_SIZE = 640
+    IOU_THRESHOLD = 0.7
+    NUM_CLASSES = 80  # COCO
+    ROI_INPUT_SIZE = 320  # Input size for detect_objects_in_roi()
+
+    def __init__(self, model_path: str = None, confidence_threshold: float = 0.5, max_batch: int = 1):
         """
         Initialize YOLO object detector
 
         Args:
-            model_path: Path to YOLO model weights (uses YOLOv8 by default)
+            model_path: Path to YOLO model (.onnx runs on ONNX Runtime, .xml on
+                OpenVINO, .engine on TensorRT, anything else on ultralytics;
+                uses YOLOv8n by default)
             confidence_threshold: Minimum confidence for detection
+            max_batch: Most frames per inference call in detect_objects_batch()
+                (models exported with a fixed batch size use that instead)
         """
         self.confidence_threshold = confidence_threshold
-
-        # Use YOLOv8n (nano) for faster inference
-        if model_path and os.path.exists(model_path):
-            self.model = YOLO(model_path)
+        self.max_batch = max_batch
+        self._static_batch = False
+        # Whether the model takes ROI_INPUT_SIZE inputs (dynamic-shape exports and ultralytics)
+        self.supports_roi = False
+        self.session = None
+        self.ov_request = None
+        self.engine = None
+        self.model = None
+
+        exported = model_path is not None and os.path.exists(model_path)
+        if exported and model_path.endswith('.onnx') and ort is not None:
+            self._load_onnx(model_path)
+            self.backend = 'onnxruntime'
+        elif exported and model_path.endswith('.xml') and ov is not None:
+            self._load_openvino(model_path)
+            self.backend = 'openvino'
+        elif exported and model_path.endswith('.engine') and trt is not None:
+            self._load_tensorrt(model_path)
+            self.backend = 'tensorrt'
         else:
-            # Download and use pretrained YOLOv8n model
-            self.model = YOLO('yolov8n.pt')
+            if YOLO is None:
+                raise ImportError("ultralytics is required unless an exported model and its runtime are available")
+
+            # verbose=False per call still leaves ultralytics' own INFO logging on
+            logging.getLogger('ultralytics').setLevel(logging.WARNING)
+
+            # Use YOLOv8n (nano) for faster inference
+            if model_path and os.path.exists(model_path):
+                self.model = YOLO(model_path)
+            else:
+                # Download and use pretrained YOLOv8n model
+                self.model = YOLO('yolov8n.pt')
+            self.backend = 'ultralytics'
+            self.supports_roi = True
 
         # Objects to detect (COCO dataset class IDs for YOLOv8/YOLOv3)
         # Following Proctoring-AI's focused approach: ONLY critical violations
@@ -56,61 +216,507 @@ class ObjectDetector:
         # Medium priority (optional monitoring)
         self.medium_priority = [63, 73, 66, 64, 62]
 
-        logger.info(f"ObjectDetector initialized with confidence threshold: {confidence_threshold}")
+        # Class id lookup tables, so per-box class checks are one vectorised gather:
+        # whether a class is kept (the models score all 80 COCO classes) ...
+        self._monitor_lut = np.zeros(self.NUM_CLASSES, dtype=bool)
+        self._monitor_lut[list(self.all_monitored_objects)] = True
+
+        # ... and its index into PRIORITY_NAMES
+        self._priority_lut = np.full(self.NUM_CLASSES, 2, dtype=np.uint8)
+        self._priority_lut[self.medium_priority] = 1
+        self._priority_lut[self.high_priority] = 0
+
+        # Returned when nothing monitored is in the frame (most frames)
+        self._no_detections = np.zeros(0, dtype=DETECTION_DTYPE)
+        self._no_detections.flags.writeable = False
+
+        # Compile the letterbox kernel now rather than on the first frame
+        if self.backend != 'ultralytics':
+            size = self.INPUT_SIZE
+            target = self._slots[0].input if self.engine is not None else self._input
+            self._letterbox(np.zeros((size, size, 3), dtype=np.uint8), target[0])
+            if self.supports_roi:
+                # ROI crops are strided views of the frame (a separate specialization)
+                crop = np.zeros((size, size + 1, 3), dtype=np.uint8)[:, :size]
+                self._letterbox(crop, self._roi_input[0], self._roi_canvas)
+
+        logger.info(f"ObjectDetector initialized ({self.backend}) with confidence threshold: {confidence_threshold}")
+
+    def _load_onnx(self, model_path: str):
+        """Create the ONNX Runtime session and its reusable input buffers"""
+        # CUDA when onnxruntime-gpu is installed, CPU otherwise
+        available = ort.get_available_providers()
+        providers = [p for p in ('CUDAExecutionProvider', 'CPUExecutionProvider') if p in available]
+
+        self.session = ort.InferenceSession(model_path, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+
+        # A fixed batch dimension has to be filled on every run; a dynamic one
+        # (export with dynamic=True) takes any batch up to max_batch
+        if isinstance(model_input.shape[0], int):
+            self.max_batch = model_input.shape[0]
+            self._static_batch = True
+
+        # FP16 exports take float16 input, FP32 and INT8 (QDQ) exports take float32
+        dtype = np.float16 if model_input.type == 'tensor(float16)' else np.float32
+        self._allocate_inputs(dtype, dynamic_size=not isinstance(model_input.shape[2], int))
+
+        logger.info(f"Loaded ONNX model {model_path} ({dtype.__name__} input, providers: {providers})")
+
+    def _load_openvino(self, model_path: str):
+        """Compile an OpenVINO IR model for the CPU and create its reusable buffers"""
+        core = ov.Core()
+        # LATENCY: one frame at a time per request, using all cores for it
+        compiled = core.compile_model(model_path, 'CPU', {'PERFORMANCE_HINT': 'LATENCY'})
+        self.ov_request = compiled.create_infer_request()
+
+        model_input = compiled.input(0)
+        if model_input.get_partial_shape()[0].is_static:
+            self.max_batch = model_input.get_partial_shape()[0].get_length()
+            self._static_batch = True
+
+        # FP32, FP16-compressed and NNCF INT8 IRs all take float32 input
+        self._allocate_inputs(np.float32, dynamic_size=model_input.get_partial_shape()[2].is_dynamic)
+
+        logger.info(f"Loaded OpenVINO model {model_path} (batch {self.max_batch}, {'static' if self._static_batch else 'dynamic'})")
+
+    def _allocate_inputs(self, dtype, dynamic_size: bool):
+        """Create the reusable model input buffers (and ROI buffers for dynamic-shape models)"""
+        size = self.INPUT_SIZE
+        self._input = np.empty((self.max_batch, 3, size, size), dtype=dtype)
+        self._canvas = np.empty((size, size, 3), dtype=np.uint8)  # Letterboxed BGR frame
+
+        # Models exported with dynamic=True also run at ROI_INPUT_SIZE
+        self.supports_roi = dynamic_size
+        if dynamic_size:
+            roi_size = self.ROI_INPUT_SIZE
+            roi_batch = self.max_batch if self._static_batch else 1
+            self._roi_input = np.zeros((roi_batch, 3, roi_size, roi_size), dtype=dtype)
+            self._roi_canvas = np.empty((roi_size, roi_size, 3), dtype=np.uint8)
+
+    def _load_tensorrt(self, engine_path: str):
+        """Deserialize a TensorRT engine and allocate its pinned host and device buffers"""
+        # Inference runs on the pool's worker threads, so the device's primary
+        # context is pushed around every call instead of being bound to this thread
+        cuda.init()
+        self._cuda_ctx = cuda.Device(0).retain_primary_context()
+        self._cuda_ctx.push()
+        try:
+            with open(engine_path, 'rb') as f:
+                data = _strip_engine_metadata(f.read())
+
+            self._trt_runtime = trt.Runtime(trt.Logger(trt.Logger.WARNING))
+            self.engine = self._trt_runtime.deserialize_cuda_engine(data)
+
+            # Two contexts on two streams: a batch is letterboxed and uploaded on
+            # one while the previous batch computes / copies back on the other
+            self._slots = [self._create_tensorrt_slot(engine_path) for _ in range(2)]
+            self._next_slot = 0
+
+            # With CuPy, frames are letterboxed on the GPU directly into the input binding
+            if gpu_letterbox.cp is not None:
+                try:
+                    for slot in self._slots:
+                        slot.gpu_letterbox = gpu_letterbox.GpuLetterbox(
+                            int(slot.d_input), slot.input.shape, slot.input.dtype, slot.stream.handle
+                        )
+                except Exception as e:
+                    logger.warning(f"GPU letterboxing unavailable, preprocessing on CPU: {e}")
+                    for slot in self._slots:
+                        slot.gpu_letterbox = None
+        finally:
+            self._cuda_ctx.pop()
+
+        # Engines have a fixed batch size (export with batch=N for batching)
+        self.max_batch = self._slots[0].input.shape[0]
+        self._static_batch = True
+
+        size = self.INPUT_SIZE
+        self._canvas = np.empty((size, size, 3), dtype=np.uint8)  # Letterboxed BGR frame
+
+        logger.info(f"Loaded TensorRT engine {engine_path} ({self._slots[0].input.dtype} input, batch {self.max_batch})")
+
+    def host_buffer(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Allocate a uint8 buffer for frames that will be passed to this detector
+
+        With GPU letterboxing the raw frame is uploaded, so frames decoded or
+        resized into a page-locked buffer are copied by async DMA instead of
+        being staged through a driver bounce buffer. Other backends read the
+        frame on the CPU and get a plain array.
+
+        Args:
+            shape: Buffer shape, e.g. (H, W, 3)
 
-    def detect_objects(self, image: np.ndarray) -> List[Dict]:
+        Returns:
+            Uninitialized uint8 array (meant to be reused across frames)
         """
-        Detect objects in the image
+        if self.engine is None or self._slots[0].gpu_letterbox is None:
+            return np.empty(shape, dtype=np.uint8)
+
+        self._cuda_ctx.push()
+        try:
+            return cuda.pagelocked_empty(shape, np.uint8, mem_flags=cuda.host_alloc_flags.PORTABLE)
+        finally:
+            self._cuda_ctx.pop()
+
+    def _create_tensorrt_slot(self, engine_path: str) -> _TensorRTSlot:
+        """Create an execution context with its own stream and I/O buffers"""
+        context = self.engine.create_execution_context()
+
+        # Host buffers are page-locked so the async copies are real DMA transfers;
+        # frames are letterboxed straight into the pinned input
+        buffers = {}
+        device_buffers = []
+        for i in range(self.engine.num_io_tensors):
+            name = self.engine.get_tensor_name(i)
+            shape = tuple(self.engine.get_tensor_shape(name))
+            if any(dim < 0 for dim in shape):
+                raise ValueError(f"TensorRT engine {engine_path} has a dynamic shape for {name}: {shape}")
+
+            host = cuda.pagelocked_empty(shape, trt.nptype(self.engine.get_tensor_dtype(name)))
+            device = cuda.mem_alloc(host.nbytes)
+            context.set_tensor_address(name, int(device))
+            device_buffers.append(device)
+            buffers[self.engine.get_tensor_mode(name) == trt.TensorIOMode.INPUT] = (host, device)
+
+        (host_in, d_in), (host_out, d_out) = buffers[True], buffers[False]
+        return _TensorRTSlot(context, cuda.Stream(), host_in, host_out, d_in, d_out, device_buffers)
+
+    def _infer(self, images: np.ndarray) -> np.ndarray:
+        """
+        Run the exported ONNX Runtime / OpenVINO model
+
+        Args:
+            images: Letterboxed (B, 3, S, S) input buffer
+
+        Returns:
+            Raw model output, one row per input image
+        """
+        if self.session is not None:
+            return self.session.run(None, {self._input_name: images})[0]
+
+        # share_inputs: the request reads the input buffer in place; the output
+        # view is only valid until the next inference (parsed before that)
+        self.ov_request.infer({0: images}, share_inputs=True)
+        return self.ov_request.get_output_tensor(0).data
+
+    def _letterbox(self, image: np.ndarray, out: np.ndarray, canvas: Optional[np.ndarray] = None) -> Tuple[float, int, int]:
+        """
+        Letterbox a BGR frame into a (3, S, S) RGB model input scaled to [0, 1]
 
         Args:
             image: BGR image from OpenCV
+            out: Destination (3, S, S) input slice
+            canvas: (S, S, 3) scratch buffer for the OpenCV path (the full-size one by default)
+
+        Returns:
+            Tuple of (scale, pad_x, pad_y) to map boxes back to the frame
+        """
+        scale, new_w, new_h, pad_x, pad_y = self._letterbox_geometry(image.shape, out.shape[-1])
+        if _letterbox_chw is not None and out.dtype == np.float32:
+            _letterbox_chw(image, out, new_w, new_h, pad_x, pad_y)
+            return scale, pad_x, pad_y
+
+        canvas = self._canvas if canvas is None else canvas
+        h, w = image.shape[:2]
+        canvas[:] = 114  # ultralytics letterbox grey
+        canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = (
+            cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+            if (new_w, new_h) != (w, h) else image
+        )
+
+        # HWC BGR -> CHW RGB and /255 in a single pass into the input buffer
+        np.multiply(canvas.transpose(2, 0, 1)[::-1], 1 / 255, out=out, casting='unsafe')
+        return scale, pad_x, pad_y
+
+    def _letterbox_gpu(self, image: np.ndarray, index: int, slot: _TensorRTSlot) -> Tuple[float, int, int]:
+        """Like _letterbox(), but run on the GPU into batch slot index of the slot's engine input"""
+        scale, new_w, new_h, pad_x, pad_y = self._letterbox_geometry(image.shape, self.INPUT_SIZE)
+        slot.gpu_letterbox(image, index, new_w, new_h, pad_x, pad_y)
+        return scale, pad_x, pad_y
+
+    def _letterbox_geometry(self, image_shape, size: int) -> Tuple[float, int, int, int, int]:
+        """Scale, resized size and padding that fit a frame into a square size x size model input"""
+        h, w = image_shape[:2]
+        scale = min(size / h, size / w)
+        new_w, new_h = round(w * scale), round(h * scale)
+        return scale, new_w, new_h, (size - new_w) // 2, (size - new_h) // 2
+
+    def _prepare_batch(self, images: List[np.ndarray],
+                       slot: Optional[_TensorRTSlot] = None) -> List[Tuple[float, int, int]]:
+        """Letterbox images into the first len(images) slots of the model input"""
+        if slot is None or slot.gpu_letterbox is None:
+            target = self._input if slot is None else slot.input
+            return [self._letterbox(image, target[i]) for i, image in enumerate(images)]
+
+        self._cuda_ctx.push()
+        try:
+            return [self._letterbox_gpu(image, i, slot) for i, image in enumerate(images)]
+        finally:
+            self._cuda_ctx.pop()
+
+    def _parse_output(self, output: np.ndarray, scale: float, pad_x: int, pad_y: int,
+                      image_shape) -> np.ndarray:
+        """
+        Decode one image's raw YOLOv8 output into detected objects
+
+        Args:
+            output: (4 + num_classes, num_anchors) predictions of one image
+            scale, pad_x, pad_y: Letterbox transform returned by _letterbox()
+            image_shape: Shape of the original frame
+
+        Returns:
+            DETECTION_DTYPE array of detected objects
+        """
+        scores = output[4:]
+        class_ids = scores.argmax(axis=0)
+        confidences = scores[class_ids, np.arange(scores.shape[1])].astype(np.float32)
+
+        # Confidence and class filtering are vectorised before NMS sees any box
+        keep = (confidences >= self.confidence_threshold) & self._monitor_lut[class_ids]
+        if not keep.any():
+            return self._no_detections
+
+        boxes = output[:4, keep].T.astype(np.float32)  # (n, 4) cx, cy, w, h
+        class_ids = class_ids[keep]
+        confidences = confidences[keep]
+
+        # Top-left corner for NMS, in letterboxed pixels
+        boxes[:, 0] -= boxes[:, 2] / 2
+        boxes[:, 1] -= boxes[:, 3] / 2
+        indices = cv2.dnn.NMSBoxesBatched(
+            boxes, confidences, class_ids, self.confidence_threshold, self.IOU_THRESHOLD
+        )
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+        # xywh in letterboxed pixels -> xyxy in frame pixels
+        boxes = boxes[indices]
+        boxes[:, 2:] += boxes[:, :2]
+        boxes[:, 0::2] -= pad_x
+        boxes[:, 1::2] -= pad_y
+        boxes /= scale
+        h, w = image_shape[:2]
+        np.clip(boxes[:, 0::2], 0, w, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, h, out=boxes[:, 1::2])
+
+        return self._to_detections(class_ids[indices], confidences[indices], boxes)
+
+    def _to_detections(self, class_ids: np.ndarray, confidences: np.ndarray, xyxy: np.ndarray) -> np.ndarray:
+        """Pack per-detection columns into a DETECTION_DTYPE array"""
+        detections = np.empty(len(class_ids), dtype=DETECTION_DTYPE)
+        detections['class_id'] = class_ids
+        detections['conf'] = confidences
+        for i, field in enumerate(('x1', 'y1', 'x2', 'y2')):
+            detections[field] = xyxy[:, i]  # Truncated like int()
+        detections['prio'] = self._priority_lut[detections['class_id']]
+        return detections
+
+    def objects_to_dicts(self, detections: np.ndarray) -> List[Dict]:
+        """
+        Materialize detections as the result entries sent to the client
+
+        Args:
+            detections: DETECTION_DTYPE array from detect_objects()
 
         Returns:
             List of detected objects with details
         """
-        # Run inference
-        results = self.model(image, conf=self.confidence_threshold, verbose=False)
-
-        detected_objects = []
-
-        # Process results
-        for result in results:
-            boxes = result.boxes
-
-            for box in boxes:
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-
-                # Only track monitored objects (both prohibited and optional)
-                if class_id in self.all_monitored_objects:
-                    # Get bounding box coordinates
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-
-                    # Determine priority level
-                    if class_id in self.high_priority:
-                        priority = 'critical'
-                    elif class_id in self.medium_priority:
-                        priority = 'high'
-                    else:
-                        priority = 'medium'
-
-                    detected_objects.append({
-                        'class_id': class_id,
-                        'class_name': self.all_monitored_objects[class_id],
-                        'confidence': confidence,
-                        'bbox': {
-                            'x1': int(x1),
-                            'y1': int(y1),
-                            'x2': int(x2),
-                            'y2': int(y2),
-                            'width': int(x2 - x1),
-                            'height': int(y2 - y1)
-                        },
-                        'is_high_priority': class_id in self.high_priority,
-                        'priority': priority
-                    })
-
-        return detected_objects
+        return [
+            {
+                'class_id': class_id,
+                'class_name': self.all_monitored_objects[class_id],
+                'confidence': confidence,
+                'bbox': {
+                    'x1': x1,
+                    'y1': y1,
+                    'x2': x2,
+                    'y2': y2,
+                    'width': x2 - x1,
+                    'height': y2 - y1
+                },
+                'is_high_priority': prio == 0,
+                'priority': PRIORITY_NAMES[prio]
+            }
+            for class_id, confidence, x1, y1, x2, y2, prio in detections.tolist()
+        ]
+
+    def detect_objects(self, image: np.ndarray) -> np.ndarray:
+        """
+        Detect objects in the image
+
+        Args:
+            image: BGR image from OpenCV
+
+        Returns:
+            DETECTION_DTYPE array of detected objects (see objects_to_dicts())
+        """
+        return self.detect_objects_batch([image])[0]
+
+    def detect_objects_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Detect objects in several images with as few inference calls as possible
+
+        Args:
+            images: BGR images from OpenCV (may differ in size)
+
+        Returns:
+            DETECTION_DTYPE array of detected objects for each image, in input order
+        """
+        if self.backend == 'ultralytics':
+            # Run inference (ultralytics stacks a list of frames into one batch)
+            results = self.model(images, conf=self.confidence_threshold, verbose=False)
+            return [self._parse_result(result) for result in results]
+
+        # Chunk k + 1 is submitted before chunk k is gathered, so with TensorRT
+        # its preprocessing and upload overlap chunk k's inference
+        detections = []
+        pending = None
+        for start in range(0, len(images), self.max_batch):
+            ticket = self.submit(images[start:start + self.max_batch])
+            if pending is not None:
+                detections.extend(self.gather(pending))
+            pending = ticket
+        if pending is not None:
+            detections.extend(self.gather(pending))
+        return detections
+
+    def detect_objects_in_roi(self, image: np.ndarray, roi: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Detect objects inside a region of the frame at the reduced ROI_INPUT_SIZE
+
+        Only available when supports_roi is set (dynamic-shape exports and the
+        ultralytics fallback); a 320x320 input costs about a quarter of 640x640.
+
+        Args:
+            image: BGR image from OpenCV
+            roi: (x1, y1, x2, y2) pixel region to search
+
+        Returns:
+            DETECTION_DTYPE array of detected objects, in frame coordinates
+        """
+        x1, y1, x2, y2 = roi
+        crop = image[y1:y2, x1:x2]
+
+        if self.backend == 'ultralytics':
+            result = self.model(crop, conf=self.confidence_threshold, imgsz=self.ROI_INPUT_SIZE, verbose=False)[0]
+            detections = self._parse_result(result)
+        else:
+            transform = self._letterbox(crop, self._roi_input[0], self._roi_canvas)
+            detections = self._parse_output(self._infer(self._roi_input)[0], *transform, crop.shape)
+
+        # Boxes are clipped to the crop; shift them into the frame (the shared empty result is read-only)
+        if len(detections):
+            detections['x1'] += x1
+            detections['x2'] += x1
+            detections['y1'] += y1
+            detections['y2'] += y1
+        return detections
+
+    def submit(self, images: List[np.ndarray]) -> Tuple:
+        """
+        Start object detection on up to max_batch images
+
+        With TensorRT the batch is letterboxed and queued (upload, inference,
+        download) on the next of two CUDA streams and this returns right away, so
+        the caller can prepare the next batch or decode the previous one while
+        the GPU works. The other backends run the whole detection here.
+
+        Args:
+            images: BGR images from OpenCV (at most max_batch)
+
+        Returns:
+            Ticket for gather(); at most two TensorRT tickets can be outstanding
+        """
+        if self.backend == 'ultralytics':
+            return None, self.detect_objects_batch(images)
+
+        if self.engine is None:
+            transforms = self._prepare_batch(images)
+            output = self._infer(self._input if self._static_batch else self._input[:len(images)])
+            return None, [
+                self._parse_output(output[i], *transform, image.shape)
+                for i, (image, transform) in enumerate(zip(images, transforms))
+            ]
+
+        slot = self._slots[self._next_slot]
+        if slot.busy:
+            raise RuntimeError("Both TensorRT streams are busy; gather() a ticket first")
+        self._next_slot ^= 1
+
+        transforms = self._prepare_batch(images, slot)
+        self._cuda_ctx.push()
+        try:
+            # GPU letterboxing already wrote the device input on this stream
+            if slot.gpu_letterbox is None:
+                cuda.memcpy_htod_async(slot.d_input, slot.input, slot.stream)
+            slot.context.execute_async_v3(slot.stream.handle)
+            cuda.memcpy_dtoh_async(slot.output, slot.d_output, slot.stream)
+        finally:
+            self._cuda_ctx.pop()
+        slot.busy = True
+
+        return slot, [(transform, image.shape) for image, transform in zip(images, transforms)]
+
+    def gather(self, ticket: Tuple) -> List[np.ndarray]:
+        """
+        Wait for a submitted batch and decode its detections
+
+        Args:
+            ticket: Result of submit()
+
+        Returns:
+            DETECTION_DTYPE array of detected objects for each image, in input order
+        """
+        slot, pending = ticket
+        if slot is None:
+            return pending
+
+        self._cuda_ctx.push()
+        try:
+            slot.stream.synchronize()
+        finally:
+            self._cuda_ctx.pop()
+            slot.busy = False
+
+        return [
+            self._parse_output(slot.output[i], *transform, image_shape)
+            for i, (transform, image_shape) in enumerate(pending)
+        ]
+
+    def _parse_result(self, result) -> np.ndarray:
+        """Convert one ultralytics result into detected objects"""
+        boxes = result.boxes
+        class_ids = boxes.cls.cpu().numpy().astype(np.int32)
+
+        # Only track monitored objects (both prohibited and optional)
+        keep = self._monitor_lut[class_ids]
+        if not keep.any():
+            return self._no_detections
+
+        return self._to_detections(
+            class_ids[keep], boxes.conf.cpu().numpy()[keep], boxes.xyxy.cpu().numpy()[keep]
+        )
+
+    @staticmethod
+    def scale_detections(detections: np.ndarray, scale_x: float, scale_y: float) -> np.ndarray:
+        """
+        Map detections made on a resized frame back to the original frame
+
+        Args:
+            detections: DETECTION_DTYPE array (scaled in place)
+            scale_x: Original width / resized width
+            scale_y: Original height / resized height
+
+        Returns:
+            The same detections, in original frame coordinates
+        """
+        # The shared empty result is read-only
+        if len(detections) and (scale_x != 1 or scale_y != 1):
+            for field, scale in (('x1', scale_x), ('y1', scale_y), ('x2', scale_x), ('y2', scale_y)):
+                np.multiply(detections[field], scale, out=detections[field], casting='unsafe')
+        return detections
 
     def check_prohibited_objects(self, image: np.ndarray) -> Dict:
         """
@@ -122,11 +728,24 @@ class ObjectDetector:
         Returns:
             Dictionary with violation status and details
         """
-        detected_objects = self.detect_objects(image)
+        return self.summarize_objects(self.detect_objects(image))
+
+    def summarize_objects(self, detections: np.ndarray) -> Dict:
+        """
+        Build the violation status for an image's detected objects
+
+        Args:
+            detections: Result of detect_objects() for one image
 
+        Returns:
+            Dictionary with violation status and details
+        """
         # Check for violations
-        has_phone = any(obj['class_id'] == 67 for obj in detected_objects)
-        has_prohibited = len(detected_objects) > 0
+        has_phone = bool((detections['class_id'] == 67).any())
+        has_prohibited = len(detections) > 0
+
+        # Dicts only for what is actually reported (nothing on a clean frame)
+        detected_objects = self.objects_to_dicts(detections)
 
         # Get high priority violations
         high_priority_violations = [
@@ -148,59 +767,38 @@ class ObjectDetector:
             'alert_type': alert_type
         }
 
-    def draw_detections(self, image: np.ndarray, objects: List[Dict]) -> np.ndarray:
+    def draw_detections(self, image: np.ndarray, detections: np.ndarray, inplace: bool = True) -> np.ndarray:
         """
         Draw bounding boxes around detected objects
 
         Args:
             image: BGR image from OpenCV
-            objects: List of detected objects
+            detections: DETECTION_DTYPE array returned by detect_objects()
+            inplace: Draw directly on image (pass False to draw on a copy)
 
         Returns:
-            Image with drawn detections
+            Image with drawn detections (image itself when there is nothing to draw)
         """
-        output = image.copy()
+        if len(detections) == 0:
+            return image
+
+        output = image if inplace else image.copy()
 
-        for obj in objects:
-            bbox = obj['bbox']
-            class_name = obj['class_name']
-            confidence = obj['confidence']
-            is_high_priority = obj['is_high_priority']
+        for class_id, confidence, x1, y1, x2, y2, prio in detections.tolist():
+            is_high_priority = prio == 0
 
             # Color: Red for high priority, Orange for others
             color = (0, 0, 255) if is_high_priority else (0, 165, 255)
 
             # Draw rectangle
-            cv2.rectangle(
-                output,
-                (bbox['x1'], bbox['y1']),
-                (bbox['x2'], bbox['y2']),
-                color,
-                2
-            )
+            cv2.rectangle(output, (x1, y1), (x2, y2), color, 2)
 
             # Draw label
-            label = f"{class_name}: {confidence:.2f}"
-            cv2.putText(
-                output,
-                label,
-                (bbox['x1'], bbox['y1'] - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                color,
-                2
-            )
+            label = f"{self.all_monitored_objects[class_id]}: {confidence:.2f}"
+            cv2.putText(output, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
             # Draw warning for high priority
             if is_high_priority:
-                cv2.putText(
-                    output,
-                    "VIOLATION!",
-                    (bbox['x1'], bbox['y2'] + 20),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6,
-                    (0, 0, 255),
-                    2
-                )
+                cv2.putText(output, "VIOLATION!", (x1, y2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
 
         return output
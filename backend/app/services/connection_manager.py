@@ -1,27 +1,98 @@
 from fastapi import WebSocket
-from typing import Dict
+from concurrent.futures import Executor
+from typing import Dict, Optional
+import asyncio
 import logging
 
+from app.services.detection_batcher import ObjectDetectionBatcher
+from app.services.proctoring_service import ProctoringService
+from app.utils.serialization import dumps
+
 logger = logging.getLogger(__name__)
 
 
 class ConnectionManager:
     """Manages WebSocket connections for multiple sessions"""
 
+    # Close code sent to a socket whose session was taken over by a newer connection
+    SESSION_REPLACED_CODE = 4000
+
     def __init__(self):
         # Dictionary to store active connections: {session_id: websocket}
         self.active_connections: Dict[str, WebSocket] = {}
 
-    async def connect(self, websocket: WebSocket, session_id: str):
-        """Accept and store a new WebSocket connection"""
+        # Proctoring state is per session, so sessions never contend on shared detectors
+        self.services: Dict[str, ProctoringService] = {}
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        executor: Optional[Executor] = None,
+        object_detector: Optional[ObjectDetectionBatcher] = None
+    ) -> ProctoringService:
+        """
+        Accept and store a new WebSocket connection along with its proctoring service
+
+        The connection is only registered once its service is built; if building
+        fails the socket is closed with 1011 (internal error) and the error re-raised.
+        A live connection with the same session id (reconnect, second tab) is
+        replaced: its socket is closed with SESSION_REPLACED_CODE and its own
+        handler releases its service via disconnect().
+
+        Args:
+            websocket: Incoming client connection
+            session_id: Unique session identifier
+            executor: Where to build the service (model loading is blocking)
+            object_detector: Batched detector shared by all sessions (None = one per session)
+
+        Returns:
+            The connection's proctoring service (pass it back to disconnect())
+        """
         await websocket.accept()
+
+        loop = asyncio.get_running_loop()
+        try:
+            service = await loop.run_in_executor(executor, ProctoringService, object_detector)
+        except Exception as e:
+            logger.error(f"Failed to initialize proctoring for session {session_id}: {e}")
+            await websocket.close(code=1011)
+            raise
+
+        replaced = self.active_connections.get(session_id)
+        self.services[session_id] = service
         self.active_connections[session_id] = websocket
+
         logger.info(f"Connection established for session: {session_id}")
         logger.info(f"Total active connections: {len(self.active_connections)}")
 
-    def disconnect(self, session_id: str):
-        """Remove a WebSocket connection"""
-        if session_id in self.active_connections:
+        if replaced is not None:
+            logger.warning(f"Session {session_id} reconnected, closing its previous connection")
+            try:
+                await replaced.close(code=self.SESSION_REPLACED_CODE)
+            except Exception as e:  # Already closed by the client
+                logger.debug(f"Previous connection of session {session_id} already closed: {e}")
+
+        return service
+
+    def disconnect(self, session_id: str, websocket: WebSocket, service: ProctoringService):
+        """
+        Remove a WebSocket connection and release its proctoring service
+
+        Registry entries are only removed while they still belong to this
+        connection, so a replaced connection never unregisters its successor.
+
+        Args:
+            session_id: Unique session identifier
+            websocket: The connection's socket
+            service: The service connect() returned for it
+        """
+        # Dropping the service releases all of the session's tracker state
+        service.close()
+        if self.services.get(session_id) is service:
+            del self.services[session_id]
+
+        if self.active_connections.get(session_id) is websocket:
             del self.active_connections[session_id]
             logger.info(f"Connection closed for session: {session_id}")
             logger.info(f"Total active connections: {len(self.active_connections)}")
@@ -29,12 +100,30 @@ class ConnectionManager:
     async def send_personal_message(self, message: dict, session_id: str):
         """Send a message to a specific session"""
         if session_id in self.active_connections:
-            await self.active_connections[session_id].send_json(message)
+            await self.active_connections[session_id].send_bytes(dumps(message))
 
     async def broadcast(self, message: dict):
         """Broadcast a message to all connected sessions"""
-        for connection in self.active_connections.values():
-            await connection.send_json(message)
+        # Encode once for every connection; binary frames like the result batches
+        payload = dumps(message)
+        connections = list(self.active_connections.items())
+
+        # Send concurrently so one slow client can't hold up the others
+        sent = await asyncio.gather(
+            *(connection.send_bytes(payload) for _, connection in connections),
+            return_exceptions=True
+        )
+
+        # Stop broadcasting to sockets that have gone away (the session's own
+        # handler still runs disconnect() for the rest of its cleanup)
+        for (session_id, connection), result in zip(connections, sent):
+            if isinstance(result, Exception) and self.active_connections.get(session_id) is connection:
+                logger.warning(f"Broadcast to session {session_id} failed, dropping connection: {result}")
+                del self.active_connections[session_id]
+
+    def get_service(self, session_id: str) -> Optional[ProctoringService]:
+        """Get the proctoring service of a connected session"""
+        return self.services.get(session_id)
 
     def get_connection(self, session_id: str) -> WebSocket:
         """Get a specific WebSocket connection"""
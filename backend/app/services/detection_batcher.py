@@ -0,0 +1,202 @@
+from concurrent.futures import Future
+from typing import Dict, List
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+from app.ml_models.object_detector import ObjectDetector
+
+logger = logging.getLogger(__name__)
+
+
+class ObjectDetectionBatcher:
+    """
+    Runs object detection for all sessions on one shared detector in micro-batches
+
+    Sessions process their frames on the inference pool's worker threads, so a
+    worker asking for detections blocks on a future while a single batching
+    thread coalesces the frames that arrive within max_wait_ms (up to
+    max_batch) into one inference call. With N active sessions the model runs
+    one batch-of-N inference instead of N batch-of-1 calls, and on TensorRT
+    the next batch is prepared and uploaded while the previous one computes.
+    Sessions that attach() are counted, so a batch goes out as soon as each
+    of them has contributed a frame rather than after the full wait.
+
+    Exposes the same check_prohibited_objects() as ObjectDetector, so it can be
+    handed to ProctoringService in place of a per-session detector.
+    """
+
+    def __init__(self, detector: ObjectDetector, max_wait_ms: int = 10):
+        """
+        Initialize the batcher and start its thread
+
+        Args:
+            detector: Detector shared by all sessions (its max_batch caps the batch size)
+            max_wait_ms: How long the first frame of a batch waits for more frames
+        """
+        self.detector = detector
+        self.max_batch = detector.max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._sessions = 0  # Sessions currently using the batcher (see attach())
+        self._sessions_lock = threading.Lock()
+
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="object-detection-batcher", daemon=True)
+        self._thread.start()
+
+        logger.info(f"ObjectDetectionBatcher started (max_batch={self.max_batch}, max_wait_ms={max_wait_ms})")
+
+    def attach(self):
+        """
+        Register a session that will send frames
+
+        A batch is dispatched without waiting out max_wait_ms once every attached
+        session has a frame in it, so a lone session doesn't pay the wait at all.
+        """
+        with self._sessions_lock:
+            self._sessions += 1
+
+    def detach(self):
+        """Unregister a session registered with attach()"""
+        with self._sessions_lock:
+            self._sessions = max(self._sessions - 1, 0)
+
+    def detect_objects(self, image: np.ndarray) -> np.ndarray:
+        """
+        Detect objects in the image as part of the next batch (blocks until done)
+
+        Args:
+            image: BGR image from OpenCV; must stay untouched until this returns
+
+        Returns:
+            DETECTION_DTYPE array of detected objects
+        """
+        return self.detect_objects_async(image).result()
+
+    def detect_objects_async(self, image: np.ndarray) -> Future:
+        """
+        Queue the image for the next batch without waiting for it
+
+        Lets the caller run other models on the frame while detection runs.
+
+        Args:
+            image: BGR image from OpenCV; must stay untouched until the future is done
+
+        Returns:
+            Future resolving to the DETECTION_DTYPE array of detected objects
+        """
+        future: Future = Future()
+        self._requests.put((image, future))
+        return future
+
+    def check_prohibited_objects(self, image: np.ndarray) -> Dict:
+        """
+        Check for prohibited objects and return violation status
+
+        Args:
+            image: BGR image from OpenCV
+
+        Returns:
+            Dictionary with violation status and details
+        """
+        return self.summarize_objects(self.detect_objects(image))
+
+    def host_buffer(self, shape) -> np.ndarray:
+        """Frame buffer suited to the shared detector (see ObjectDetector.host_buffer)"""
+        return self.detector.host_buffer(shape)
+
+    def summarize_objects(self, detections: np.ndarray) -> Dict:
+        """Violation status and details for detections (see ObjectDetector.summarize_objects)"""
+        return self.detector.summarize_objects(detections)
+
+    def close(self):
+        """Stop the batching thread once the queued frames are processed"""
+        self._requests.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        """Collect frames into batches and run them until close() is called"""
+        pending = None  # (ticket, futures) of the batch running on the detector
+        running = True
+        while running:
+            # While a batch is in flight only the frames already queued are taken,
+            # so they're prepared while it computes; otherwise wait for a batch to fill
+            batch, running = self._collect(wait=pending is None)
+            submitted = self._submit(batch) if batch else None
+            if pending is not None:
+                self._gather(*pending)
+            pending = submitted
+
+        if pending is not None:
+            self._gather(*pending)
+
+    def _collect(self, wait: bool):
+        """
+        Take up to max_batch queued requests
+
+        Args:
+            wait: Block for a first request, then up to max_wait for more
+
+        Returns:
+            Tuple of (requests, whether close() hasn't been called)
+        """
+        batch = []
+        if wait:
+            request = self._requests.get()
+            if request is None:
+                return batch, False
+            batch.append(request)
+            deadline = time.monotonic() + self.max_wait
+            # Each session has at most one frame in flight, so there is no point
+            # waiting for more frames than there are sessions
+            expected = self._sessions or self.max_batch
+
+        while len(batch) < self.max_batch:
+            if wait and len(batch) >= expected:
+                wait = False  # Dispatch now, but still take frames already queued
+            try:
+                if wait:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    request = self._requests.get(timeout=timeout)
+                else:
+                    request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, False
+            batch.append(request)
+
+        return batch, True
+
+    def _submit(self, batch: List):
+        """Start detection of a batch; returns (ticket, futures) or None if it failed"""
+        futures = [future for _, future in batch]
+        try:
+            return self.detector.submit([image for image, _ in batch]), futures
+        except Exception as e:
+            self._fail(futures, e)
+            return None
+
+    def _gather(self, ticket, futures: List[Future]):
+        """Wait for a submitted batch and resolve its futures"""
+        try:
+            detections = self.detector.gather(ticket)
+        except Exception as e:
+            self._fail(futures, e)
+            return
+
+        for future, objects in zip(futures, detections):
+            future.set_result(objects)
+
+    @staticmethod
+    def _fail(futures: List[Future], error: Exception):
+        """Propagate a detection error to every waiting session"""
+        logger.error(f"Batched object detection failed: {error}")
+        for future in futures:
+            future.set_exception(error)
@@ -0,0 +1,85 @@
+import orjson
+import redis.asyncio as redis
+import xxhash
+from redis.exceptions import RedisError
+from typing import Dict, Optional
+import logging
+import time
+
+from app.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class FrameResultCache:
+    """
+    Redis-backed cache of frame processing results (cache-aside)
+
+    Results are keyed by a fast non-cryptographic hash (xxh3) of the raw
+    frame bytes, so a frame that arrives twice - client retries, replays
+    after a flaky reconnect - skips decoding and ML inference entirely.
+    Cached results carry 'cached': True and no alerts or violations.
+    """
+
+    # How long to stop using Redis after a connection error
+    RETRY_AFTER_SECONDS = 30
+
+    def __init__(self, client: redis.Redis, ttl_seconds: int = 5):
+        """
+        Initialize frame result cache
+
+        Args:
+            client: Shared async Redis client
+            ttl_seconds: How long cached results stay valid
+        """
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self._disabled_until = 0.0
+
+        logger.info(f"FrameResultCache initialized with TTL: {ttl_seconds}s")
+
+    def key(self, session_id: str, data: bytes) -> str:
+        """Build the cache key for a session's raw frame bytes"""
+        return f"pf:{session_id}:{xxhash.xxh3_64_hexdigest(data)}"
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up cached results
+
+        Returns:
+            Cached results dictionary, or None on a miss or Redis error
+        """
+        if time.monotonic() < self._disabled_until:
+            return None
+
+        try:
+            cached = await self.client.get(key)
+        except RedisError as e:
+            self._backoff(e)
+            return None
+
+        return orjson.loads(cached) if cached else None
+
+    async def set(self, key: str, results: Dict):
+        """
+        Store results for a frame
+
+        Alerts and violations are not stored: a replayed frame must not raise
+        its alerts again (that would bypass the alert cooldown).
+        """
+        if time.monotonic() < self._disabled_until:
+            return
+
+        cached = {**results, 'violations': [], 'alerts': [], 'cached': True}
+        if cached.get('status') == 'violations_detected':
+            cached['status'] = 'ok'
+
+        try:
+            await self.client.set(key, dumps(cached), ex=self.ttl_seconds)
+        except RedisError as e:
+            self._backoff(e)
+
+    def _backoff(self, error: Exception):
+        """Stop hitting Redis for a while so an outage doesn't stall every frame"""
+        logger.warning(f"Frame cache unavailable, retrying in {self.RETRY_AFTER_SECONDS}s: {error}")
+        self._disabled_until = time.monotonic() + self.RETRY_AFTER_SECONDS
@@ -0,0 +1,289 @@
+from fastapi import WebSocket, WebSocketDisconnect
+from concurrent.futures import Executor, Future
+from typing import Any, Optional, Set, Tuple
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.services.frame_cache import FrameResultCache
+from app.services.proctoring_service import ProctoringService
+from app.utils.frame_decoder import FrameDecoder
+from app.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Export dropped-frame counts to Prometheus when the client library is installed
+try:
+    from prometheus_client import Counter
+    FRAMES_DROPPED = Counter(
+        'proctor_frames_dropped_total',
+        'Stale frames replaced by a newer frame before inference'
+    )
+except ImportError:
+    FRAMES_DROPPED = None
+
+
+class LatestSlot:
+    """
+    Single-item hand-off between two pipeline stages that keeps only the newest item
+
+    Proctoring only cares about the freshest frame, so a put() overwrites
+    whatever the consumer has not picked up yet instead of queueing behind it.
+    """
+
+    def __init__(self):
+        self._item: Any = None
+        self._ready = asyncio.Event()
+
+    def put(self, item: Any) -> Optional[Any]:
+        """
+        Store an item, replacing any pending one
+
+        Returns:
+            The pending item that was replaced, or None
+        """
+        dropped = self._item
+        self._item = item
+        self._ready.set()
+        return dropped
+
+    async def get(self) -> Any:
+        """Wait for and take the newest item"""
+        await self._ready.wait()
+        item = self._item
+        self._item = None
+        self._ready.clear()
+        return item
+
+
+class FramePipeline:
+    """
+    Per-connection receive/decode -> inference -> send pipeline
+
+    Each stage runs as its own asyncio task, connected by bounded hand-offs, so
+    the next frame is received and decoded while the current one is being
+    processed and earlier results are being sent. Steady-state throughput is
+    set by the slowest stage instead of the sum of all stages.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        service: ProctoringService,
+        decoder: FrameDecoder,
+        pool: Executor,
+        frame_cache: Optional[FrameResultCache] = None,
+        decode_pool: Optional[Executor] = None
+    ):
+        """
+        Initialize the pipeline for one WebSocket connection
+
+        Args:
+            websocket: Accepted client connection
+            session_id: Unique session identifier
+            service: Proctoring service that processes frames
+            decoder: JPEG decoder for incoming frames
+            pool: Executor that runs CPU-bound frame processing
+            frame_cache: Optional cache of results for duplicate frames
+            decode_pool: Executor that decodes incoming frames (None decodes on the event loop)
+        """
+        self.websocket = websocket
+        self.session_id = session_id
+        self.service = service
+        self.decoder = decoder
+        self.pool = pool
+        self.frame_cache = frame_cache
+        self.decode_pool = decode_pool
+
+        # Newest (image, cache_key, cached_results) waiting for inference (stale items are dropped)
+        self.frames = LatestSlot()
+        # Results waiting to be sent (inference waits when full, results are never dropped)
+        self.results: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_BATCH_MAX_SIZE)
+
+        self.frames_dropped = 0
+
+        # Frame currently running on the pool (it can outlive a cancelled inference task)
+        self._inflight: Optional[Future] = None
+        # Frame currently being decoded on the decode pool (same caveat)
+        self._decoding: Optional[Future] = None
+        # Background Gemini verifications (see _verify)
+        self._verification_tasks: Set[asyncio.Task] = set()
+        # Background frame cache writes (never delay a reply)
+        self._cache_tasks: Set[asyncio.Task] = set()
+
+    async def run(self):
+        """
+        Run all stages until the client disconnects
+
+        Raises:
+            WebSocketDisconnect (or any other stage error) once the pipeline stops
+        """
+        tasks = [
+            asyncio.create_task(self._decode_stage()),
+            asyncio.create_task(self._inference_stage()),
+            asyncio.create_task(self._send_stage()),
+        ]
+
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            tasks.extend(self._verification_tasks)
+            tasks.extend(self._cache_tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Cancelling the task does not stop a frame already running on a worker
+            # thread; wait for it so the session's models (and decode buffers) can
+            # be torn down safely
+            running = [f for f in (self._inflight, self._decoding) if f is not None]
+            if running:
+                await asyncio.gather(*map(asyncio.wrap_future, running), return_exceptions=True)
+
+            self.decoder.end_session(self.session_id)
+
+    async def _decode_stage(self):
+        """Receive frames from the client and decode them"""
+        # Receive video frame data from client
+        async for data in self.websocket.iter_bytes():
+            logger.debug("Received %d bytes from session %s", len(data), self.session_id)
+
+            # Identical frame bytes seen recently (retries, reconnect replays) reuse cached results
+            cache_key = None
+            if self.frame_cache is not None:
+                cache_key = self.frame_cache.key(self.session_id, data)
+                cached = await self.frame_cache.get(cache_key)
+                if cached is not None:
+                    # Answered by the inference stage, so it stays behind the frame in flight
+                    self._hand_off((None, cache_key, cached))
+                    continue
+
+            # Convert bytes to image (into one of the session's scratch buffers),
+            # off the event loop so receiving and sending stay responsive
+            if self.decode_pool is not None:
+                self._decoding = self.decode_pool.submit(self.decoder.decode, data, self.session_id)
+                image = await asyncio.wrap_future(self._decoding)
+            else:
+                image = self.decoder.decode(data, self.session_id)
+
+            if image is None:
+                logger.error("Failed to decode image for session %s", self.session_id)
+                continue
+
+            self._hand_off((image, cache_key, None))
+
+        # iter_bytes() ends quietly when the client disconnects; stop the other stages
+        raise WebSocketDisconnect()
+
+    def _hand_off(self, item: Tuple):
+        """Pass a frame (or a cached reply) to the inference stage"""
+        # Keep latency bounded: a newer frame replaces one still waiting for inference
+        dropped = self.frames.put(item)
+        if dropped is not None:
+            if dropped[0] is not None:
+                self.decoder.release(self.session_id, dropped[0])
+            self.frames_dropped += 1
+            if FRAMES_DROPPED is not None:
+                FRAMES_DROPPED.inc()
+
+    async def _inference_stage(self):
+        """Process decoded frames with the ML models"""
+        while True:
+            image, cache_key, cached = await self.frames.get()
+            if cached is not None:
+                await self.results.put(cached)
+                continue
+
+            # Process the frame with ML models off the event loop; the clock is
+            # read once here and shared by every time check for this frame
+            self._inflight = self.pool.submit(
+                self.service.process_frame, image, self.session_id, time.monotonic()
+            )
+            results = await asyncio.wrap_future(self._inflight)
+
+            # Frame buffer can be reused once processing is done
+            self.decoder.release(self.session_id, image)
+
+            # Gemini checks for alerts this frame raised run in the background; the
+            # confirmed alerts follow as their own result once the verdicts are in
+            verifications = self.service.take_verifications()
+            if verifications is not None:
+                task = asyncio.create_task(self._verify(verifications))
+                self._verification_tasks.add(task)
+                task.add_done_callback(self._verification_tasks.discard)
+
+            self._log_results(results)
+            await self.results.put(results)
+
+            if self.frame_cache is not None:
+                task = asyncio.create_task(self.frame_cache.set(cache_key, results))
+                self._cache_tasks.add(task)
+                task.add_done_callback(self._cache_tasks.discard)
+
+    async def _verify(self, verifications):
+        """Verify a frame's violations with Gemini and queue the confirmed alerts"""
+        try:
+            results = await self.service.verify_violations(verifications, self.session_id)
+        except Exception as e:
+            logger.error("AI verification failed for session %s: %s", self.session_id, e)
+            return
+
+        if results['violations']:
+            self._log_results(results)
+            await self.results.put(results)
+
+    async def _send_stage(self):
+        """
+        Coalesce pending results into batched WebSocket messages
+
+        Waits for the first pending result, then keeps collecting until either
+        WS_BATCH_MAX_SIZE results are pending or WS_BATCH_INTERVAL_MS has elapsed,
+        and sends them as a single frame.
+        """
+        loop = asyncio.get_running_loop()
+        interval = settings.WS_BATCH_INTERVAL_MS / 1000
+
+        while True:
+            batch = [await self.results.get()]
+            deadline = loop.time() + interval
+
+            while len(batch) < settings.WS_BATCH_MAX_SIZE:
+                try:
+                    batch.append(self.results.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.results.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # orjson-encoded binary frame (skips Starlette's json.dumps + re-encode)
+            await self.websocket.send_bytes(dumps({
+                "type": "proctoring_batch",
+                "results": batch,
+                "frames_dropped": self.frames_dropped,
+                "session_id": self.session_id
+            }))
+
+    def _log_results(self, results: dict):
+        """Log alerts and violations for a processed frame"""
+        # Log alerts being sent
+        if results.get('alerts') and logger.isEnabledFor(logging.INFO):
+            logger.info("🚨 Sending %d ALERTS to frontend for session %s", len(results['alerts']), self.session_id)
+            for alert in results['alerts']:
+                logger.info("  📢 Alert: %s - %s (severity: %s)", alert['type'], alert['message'], alert['severity'])
+
+        # Log violations
+        if results.get('violations') and logger.isEnabledFor(logging.WARNING):
+            logger.warning("Session %s: %d violations detected", self.session_id, len(results['violations']))
+            for violation in results['violations']:
+                logger.warning("  - %s: %s", violation['type'], violation['description'])
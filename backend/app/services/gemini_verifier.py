@@ -1,69 +1,22 @@
 import google.generativeai as genai
 import cv2
 import numpy as np
-from typing import Dict, Optional, List
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, Optional, List, Tuple
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+import asyncio
 import logging
-import base64
-from PIL import Image
-import io
+import time
 
 from app.core.config import settings
+from app.utils.image_hash import dhash, hamming_distance
 
 logger = logging.getLogger(__name__)
 
-
-class GeminiViolationVerifier:
-    """
-    Uses Google Gemini (multimodal AI) to verify if detected violations are genuine
-
-    How it works:
-    1. Takes a screenshot (image) when a violation is about to trigger an alert
-    2. Sends image + violation context to Gemini for visual analysis
-    3. Gemini analyzes the actual scene and returns verdict + confidence
-    4. Only genuine violations (70%+ confidence) are reported
-
-    This dramatically reduces false positives by having AI verify what it "sees"
-    """
-
-    def __init__(self):
-        """Initialize Gemini API"""
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-            self.enabled = settings.ENABLE_AI_VERIFICATION
-            logger.info(f"GeminiViolationVerifier initialized with model: {settings.GEMINI_MODEL}")
-        else:
-            self.enabled = False
-            logger.warning("Gemini API key not set. AI verification disabled.")
-
-    def verify_eye_tracking_violation(self, image: np.ndarray, violation_data: Dict) -> Dict:
-        """
-        Verify if eye tracking violation is genuine
-
-        Args:
-            image: Screenshot from webcam (BGR format)
-            violation_data: Data from eye tracker (direction, duration, etc.)
-
-        Returns:
-            Dict with verification results
-        """
-        if not self.enabled:
-            return {
-                'verified': True,  # Pass through if disabled
-                'confidence': 1.0,
-                'reasoning': 'AI verification disabled',
-                'ai_analysis': None
-            }
-
-        try:
-            # Convert to PIL Image
-            pil_image = self._convert_to_pil(image)
-
-            # Create prompt
-            direction = violation_data.get('gaze_direction', 'unknown')
-            duration = violation_data.get('duration', 0)
-
-            prompt = f"""Analyze this interview screenshot carefully for eye tracking behavior.
+# Verification prompts, filled in with str.format_map() per request
+_EYE_TRACKING_PROMPT = """Analyze this interview screenshot carefully for eye tracking behavior.
 
 **CONTEXT:**
 - Detection Type: EYES LOOKING AWAY
@@ -83,7 +36,7 @@ Verify if this is a genuine violation that should trigger an alert.
    - Poor lighting causing detection error
    - Glare or reflection on glasses
 4. **Head Position**: Is their head also turned {direction}, or just eyes?
-5. **Duration Context**: {duration:.1f} seconds is {"very brief (likely normal)" if duration < 3 else "moderate (could be suspicious)" if duration < 5 else "prolonged (suspicious)"}
+5. **Duration Context**: {duration:.1f} seconds is {duration_class}
 6. **Body Language**: Do they appear to be reading from notes or another screen?
 
 **IMPORTANT CONSIDERATIONS:**
@@ -101,50 +54,7 @@ Verify if this is a genuine violation that should trigger an alert.
     "recommended_action": "monitor/warn/flag"
 }}"""
 
-            # Get Gemini response
-            response = self.model.generate_content([prompt, pil_image])
-
-            # Parse response
-            analysis = self._parse_gemini_response(response.text)
-
-            return {
-                'verified': analysis.get('violation_confirmed', analysis.get('is_genuine_violation', True)),
-                'confidence': analysis.get('confidence', 0.5),
-                'reasoning': analysis.get('explanation', analysis.get('reasoning', 'AI analysis completed')),
-                'actual_behavior': analysis.get('actual_behavior', 'unknown'),
-                'severity': analysis.get('severity', 'medium'),
-                'recommended_action': analysis.get('recommended_action', 'monitor'),
-                'ai_analysis': analysis
-            }
-
-        except Exception as e:
-            logger.error(f"Gemini verification failed: {e}")
-            return {
-                'verified': True,  # Pass through on error
-                'confidence': 1.0,
-                'reasoning': f'Verification error: {str(e)}',
-                'ai_analysis': None
-            }
-
-    def verify_multiple_persons_violation(self, image: np.ndarray, violation_data: Dict) -> Dict:
-        """
-        Verify if multiple persons detection is genuine
-
-        Args:
-            image: Screenshot from webcam
-            violation_data: Data from face detector
-
-        Returns:
-            Dict with verification results
-        """
-        if not self.enabled:
-            return {'verified': True, 'confidence': 1.0, 'reasoning': 'AI verification disabled'}
-
-        try:
-            pil_image = self._convert_to_pil(image)
-            num_faces = violation_data.get('num_faces', 0)
-
-            prompt = f"""Analyze this interview screenshot carefully for multiple person detection.
+_MULTIPLE_PERSONS_PROMPT = """Analyze this interview screenshot carefully for multiple person detection.
 
 **CONTEXT:**
 - Detection Type: MULTIPLE PERSONS DETECTED
@@ -191,45 +101,7 @@ Verify if there are genuinely multiple real people present (which is a violation
     "recommended_action": "monitor/warn/flag"
 }}"""
 
-            response = self.model.generate_content([prompt, pil_image])
-            analysis = self._parse_gemini_response(response.text)
-
-            return {
-                'verified': analysis.get('violation_confirmed', analysis.get('is_genuine_violation', True)),
-                'confidence': analysis.get('confidence', 0.5),
-                'reasoning': analysis.get('explanation', analysis.get('reasoning', 'AI analysis completed')),
-                'actual_person_count': analysis.get('actual_person_count', num_faces),
-                'false_positive_causes': analysis.get('false_positive_causes', []),
-                'severity': analysis.get('severity', 'high'),
-                'recommended_action': analysis.get('recommended_action', 'flag'),
-                'ai_analysis': analysis
-            }
-
-        except Exception as e:
-            logger.error(f"Gemini verification failed: {e}")
-            return {'verified': True, 'confidence': 1.0, 'reasoning': f'Error: {str(e)}', 'severity': 'high'}
-
-    def verify_object_detection_violation(self, image: np.ndarray, violation_data: Dict) -> Dict:
-        """
-        Verify if prohibited object detection is genuine
-
-        Args:
-            image: Screenshot from webcam
-            violation_data: Data from object detector
-
-        Returns:
-            Dict with verification results
-        """
-        if not self.enabled:
-            return {'verified': True, 'confidence': 1.0, 'reasoning': 'AI verification disabled'}
-
-        try:
-            pil_image = self._convert_to_pil(image)
-            objects = violation_data.get('objects', [])
-            object_names = [obj.get('class_name', 'unknown') for obj in objects]
-            object_list = ', '.join(object_names)
-
-            prompt = f"""Analyze this interview screenshot carefully for prohibited objects.
+_OBJECT_DETECTION_PROMPT = """Analyze this interview screenshot carefully for prohibited objects.
 
 **CONTEXT:**
 - Detection Type: PROHIBITED OBJECTS
@@ -282,64 +154,422 @@ Verify if the detected objects are genuine violations that warrant an alert.
     "recommended_action": "ignore/monitor/warn/flag"
 }}"""
 
-            response = self.model.generate_content([prompt, pil_image])
-            analysis = self._parse_gemini_response(response.text)
 
+# Response schemas: Gemini's JSON mode is constrained to these, so replies
+# are valid JSON with every field present (validated again on arrival)
+class EyeVerdict(TypedDict):
+    violation_confirmed: bool
+    confidence: float
+    actual_behavior: str
+    explanation: str
+    severity: str
+    recommended_action: str
+
+
+class PersonsVerdict(TypedDict):
+    violation_confirmed: bool
+    confidence: float
+    actual_person_count: int
+    explanation: str
+    false_positive_causes: List[str]
+    severity: str
+    recommended_action: str
+
+
+class ObjectSeen(TypedDict):
+    name: str
+    is_prohibited: bool
+    being_used: bool
+
+
+class ObjectsVerdict(TypedDict):
+    violation_confirmed: bool
+    confidence: float
+    actual_objects_seen: List[ObjectSeen]
+    explanation: str
+    false_positive_likelihood: float
+    severity: str
+    recommended_action: str
+
+
+_VERDICT_ADAPTERS = {schema: TypeAdapter(schema) for schema in (EyeVerdict, PersonsVerdict, ObjectsVerdict)}
+
+
+def _duration_class(duration: float) -> str:
+    """How suspicious a looking-away duration is, for the eye tracking prompt"""
+    if duration < 3:
+        return "very brief (likely normal)"
+    if duration < 5:
+        return "moderate (could be suspicious)"
+    return "prolonged (suspicious)"
+
+
+class VerificationCache:
+    """
+    Short-lived cache of Gemini verdicts keyed by a perceptual hash of the frame
+
+    A violation usually keeps firing on near-identical frames; within the TTL
+    a frame whose hash is within max_distance bits of a cached one (and has
+    the same violation discriminants) reuses that verdict instead of paying
+    for another network round-trip.
+    """
+
+    def __init__(self, ttl_seconds: float = 2.0, maxsize: int = 64, max_distance: int = 6):
+        """
+        Initialize verification cache
+
+        Args:
+            ttl_seconds: How long a verdict stays valid
+            maxsize: Most verdicts kept (least recently used are evicted)
+            max_distance: Largest hash Hamming distance that still counts as the same scene
+        """
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self.max_distance = max_distance
+        # {(image_hash, discriminants): (expires_at, verdict)}
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, image_hash: int, discriminants: Hashable) -> Optional[Dict]:
+        """Return a live cached verdict for a similar frame, or None"""
+        now = time.monotonic()
+        for key in list(self._entries):
+            expires_at, verdict = self._entries[key]
+            if expires_at <= now:
+                del self._entries[key]
+            elif key[1] == discriminants and hamming_distance(key[0], image_hash) <= self.max_distance:
+                self._entries.move_to_end(key)
+                return verdict
+        return None
+
+    def set(self, image_hash: int, discriminants: Hashable, verdict: Dict):
+        """Store a verdict"""
+        self._entries[(image_hash, discriminants)] = (time.monotonic() + self.ttl_seconds, verdict)
+        self._entries.move_to_end((image_hash, discriminants))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class RequestLimiter:
+    """
+    Caps how many Gemini requests are in flight across all sessions
+
+    Requests beyond max_concurrent wait for a slot; once max_pending are
+    already waiting, new ones are rejected instead of queued, so a burst of
+    violations (or a slow API) can't pile up frames and quota without bound.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_pending: int = 16):
+        """
+        Initialize request limiter
+
+        Args:
+            max_concurrent: Most requests sent at the same time
+            max_pending: Most requests waiting for a slot
+        """
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self._semaphore: Optional[asyncio.Semaphore] = None  # Created on the event loop
+        self._waiting = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one request slot (raises RuntimeError if too many are already waiting)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self._semaphore.locked() and self._waiting >= self.max_pending:
+            raise RuntimeError(f"{self._waiting} Gemini verifications already waiting")
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+class GeminiViolationVerifier:
+    """
+    Uses Google Gemini (multimodal AI) to verify if detected violations are genuine
+
+    How it works:
+    1. Takes a screenshot (image) when a violation is about to trigger an alert
+    2. Sends image + violation context to Gemini for visual analysis
+    3. Gemini analyzes the actual scene and returns verdict + confidence
+    4. Only genuine violations (70%+ confidence) are reported
+
+    This dramatically reduces false positives by having AI verify what it "sees"
+    """
+
+    # Verification image size and quality sent to Gemini
+    MAX_IMAGE_EDGE = 768
+    JPEG_QUALITY = 80
+
+    # Shared by every session's verifier (all run on the same event loop)
+    limiter = RequestLimiter(settings.GEMINI_MAX_CONCURRENT, settings.GEMINI_MAX_PENDING)
+
+    def __init__(self):
+        """Initialize Gemini API"""
+        # Recent verdicts, so repeated triggers on the same scene skip the API call
+        self.cache = VerificationCache(ttl_seconds=settings.GEMINI_CACHE_TTL_SECONDS)
+
+        if settings.GEMINI_API_KEY:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+            self.enabled = settings.ENABLE_AI_VERIFICATION
+            logger.info(f"GeminiViolationVerifier initialized with model: {settings.GEMINI_MODEL}")
+        else:
+            self.enabled = False
+            logger.warning("Gemini API key not set. AI verification disabled.")
+
+    async def verify_eye_tracking_violation(
+        self, image: np.ndarray, violation_data: Dict, image_blob: Optional[Dict] = None,
+        image_hash: Optional[int] = None
+    ) -> Dict:
+        """
+        Verify if eye tracking violation is genuine
+
+        Args:
+            image: Screenshot from webcam (BGR format)
+            image_blob: The same frame already encoded with encode_jpeg() (encoded here if omitted)
+            image_hash: dhash() of the frame (computed here if omitted)
+            violation_data: Data from eye tracker (direction, duration, etc.)
+
+        Returns:
+            Dict with verification results
+        """
+        if not self.enabled:
             return {
-                'verified': analysis.get('violation_confirmed', analysis.get('is_genuine_violation', True)),
-                'confidence': analysis.get('confidence', 0.5),
-                'reasoning': analysis.get('explanation', analysis.get('reasoning', 'AI analysis completed')),
-                'actual_objects_seen': analysis.get('actual_objects_seen', analysis.get('verified_objects', [])),
-                'false_positive_likelihood': analysis.get('false_positive_likelihood', 0.0),
-                'severity': analysis.get('severity', 'high'),
-                'recommended_action': analysis.get('recommended_action', 'flag'),
+                'verified': True,  # Pass through if disabled
+                'confidence': 1.0,
+                'reasoning': 'AI verification disabled',
+                'ai_analysis': None
+            }
+
+        direction = violation_data.get('gaze_direction', 'unknown')
+        if image_hash is None:
+            image_hash = await self._offload(dhash, image)
+        cache_key = ('eyes_looking_away', direction)
+        cached = self.cache.get(image_hash, cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            image_blob = image_blob or await self._offload(self.encode_jpeg, image)
+
+            # Create prompt
+            duration = violation_data.get('duration', 0)
+
+            prompt = _EYE_TRACKING_PROMPT.format_map({
+                'direction': direction,
+                'duration': duration,
+                'duration_class': _duration_class(duration),
+            })
+
+            # Get Gemini response
+            analysis = await self._generate(prompt, image_blob, EyeVerdict)
+
+            verdict = {
+                'verified': analysis['violation_confirmed'],
+                'confidence': analysis['confidence'],
+                'reasoning': analysis['explanation'],
+                'actual_behavior': analysis['actual_behavior'],
+                'severity': analysis['severity'],
+                'recommended_action': analysis['recommended_action'],
                 'ai_analysis': analysis
             }
+            self.cache.set(image_hash, cache_key, verdict)
+            return verdict
+
+        except Exception as e:
+            logger.error(f"Gemini verification failed: {e}")
+            return {
+                'verified': True,  # Pass through on error
+                'confidence': 1.0,
+                'reasoning': f'Verification error: {str(e)}',
+                'ai_analysis': None
+            }
+
+    async def verify_multiple_persons_violation(
+        self, image: np.ndarray, violation_data: Dict, image_blob: Optional[Dict] = None,
+        image_hash: Optional[int] = None
+    ) -> Dict:
+        """
+        Verify if multiple persons detection is genuine
+
+        Args:
+            image: Screenshot from webcam
+            image_blob: The same frame already encoded with encode_jpeg() (encoded here if omitted)
+            image_hash: dhash() of the frame (computed here if omitted)
+            violation_data: Data from face detector
+
+        Returns:
+            Dict with verification results
+        """
+        if not self.enabled:
+            return {'verified': True, 'confidence': 1.0, 'reasoning': 'AI verification disabled'}
+
+        num_faces = violation_data.get('num_faces', 0)
+        if image_hash is None:
+            image_hash = await self._offload(dhash, image)
+        cache_key = ('multiple_persons', num_faces)
+        cached = self.cache.get(image_hash, cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            image_blob = image_blob or await self._offload(self.encode_jpeg, image)
+
+            prompt = _MULTIPLE_PERSONS_PROMPT.format_map({'num_faces': num_faces})
+
+            analysis = await self._generate(prompt, image_blob, PersonsVerdict)
+
+            verdict = {
+                'verified': analysis['violation_confirmed'],
+                'confidence': analysis['confidence'],
+                'reasoning': analysis['explanation'],
+                'actual_person_count': analysis['actual_person_count'],
+                'false_positive_causes': analysis['false_positive_causes'],
+                'severity': analysis['severity'],
+                'recommended_action': analysis['recommended_action'],
+                'ai_analysis': analysis
+            }
+            self.cache.set(image_hash, cache_key, verdict)
+            return verdict
 
         except Exception as e:
             logger.error(f"Gemini verification failed: {e}")
             return {'verified': True, 'confidence': 1.0, 'reasoning': f'Error: {str(e)}', 'severity': 'high'}
 
-    def _convert_to_pil(self, image: np.ndarray) -> Image.Image:
-        """Convert OpenCV BGR image to PIL RGB Image"""
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        return Image.fromarray(rgb_image)
+    async def verify_object_detection_violation(
+        self, image: np.ndarray, violation_data: Dict, image_blob: Optional[Dict] = None,
+        image_hash: Optional[int] = None
+    ) -> Dict:
+        """
+        Verify if prohibited object detection is genuine
+
+        Args:
+            image: Screenshot from webcam
+            image_blob: The same frame already encoded with encode_jpeg() (encoded here if omitted)
+            image_hash: dhash() of the frame (computed here if omitted)
+            violation_data: Data from object detector
 
-    def _parse_gemini_response(self, response_text: str) -> Dict:
+        Returns:
+            Dict with verification results
         """
-        Parse Gemini's JSON response
+        if not self.enabled:
+            return {'verified': True, 'confidence': 1.0, 'reasoning': 'AI verification disabled'}
+
+        objects = violation_data.get('objects', [])
+        object_names = [obj.get('class_name', 'unknown') for obj in objects]
+        if image_hash is None:
+            image_hash = await self._offload(dhash, image)
+        cache_key = ('prohibited_object', tuple(sorted(object_names)))
+        cached = self.cache.get(image_hash, cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            image_blob = image_blob or await self._offload(self.encode_jpeg, image)
+            object_list = ', '.join(object_names)
+
+            prompt = _OBJECT_DETECTION_PROMPT.format_map({'object_list': object_list})
+
+            analysis = await self._generate(prompt, image_blob, ObjectsVerdict)
+
+            verdict = {
+                'verified': analysis['violation_confirmed'],
+                'confidence': analysis['confidence'],
+                'reasoning': analysis['explanation'],
+                'actual_objects_seen': analysis['actual_objects_seen'],
+                'false_positive_likelihood': analysis['false_positive_likelihood'],
+                'severity': analysis['severity'],
+                'recommended_action': analysis['recommended_action'],
+                'ai_analysis': analysis
+            }
+            self.cache.set(image_hash, cache_key, verdict)
+            return verdict
+
+        except Exception as e:
+            logger.error(f"Gemini verification failed: {e}")
+            return {'verified': True, 'confidence': 1.0, 'reasoning': f'Error: {str(e)}', 'severity': 'high'}
+
+    async def _generate(self, prompt: str, image_blob: Dict, schema: type) -> Dict:
+        """
+        Send one verification request to Gemini in JSON mode
+
+        Waits for a limiter slot first; the wait and the call together are
+        bounded by GEMINI_TIMEOUT_SECONDS so a stalled API can't hold a frame.
 
         Args:
-            response_text: Raw response from Gemini
+            prompt: Verification prompt
+            image_blob: Frame encoded with encode_jpeg()
+            schema: Verdict TypedDict the reply must follow
 
         Returns:
-            Parsed dictionary
+            Validated verdict (raises if the reply doesn't match the schema)
         """
+        generation_config = {'response_mime_type': 'application/json', 'response_schema': schema}
+
+        async def request():
+            async with self.limiter.slot():
+                return await self.model.generate_content_async(
+                    [prompt, image_blob], generation_config=generation_config
+                )
+
         try:
-            # Remove markdown code blocks if present
-            cleaned_text = response_text.strip()
-            if cleaned_text.startswith('```json'):
-                cleaned_text = cleaned_text[7:]
-            if cleaned_text.startswith('```'):
-                cleaned_text = cleaned_text[3:]
-            if cleaned_text.endswith('```'):
-                cleaned_text = cleaned_text[:-3]
+            response = await asyncio.wait_for(request(), timeout=settings.GEMINI_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Gemini did not answer within {settings.GEMINI_TIMEOUT_SECONDS}s")
+
+        return _VERDICT_ADAPTERS[schema].validate_json(response.text)
 
-            cleaned_text = cleaned_text.strip()
+    def prepare_image(self, image: np.ndarray) -> Tuple[int, Optional[Dict]]:
+        """
+        Hash and encode a frame once for every verifier it is sent to
+
+        CPU-bound (resize + JPEG encode of a full frame); run it in an executor.
 
-            # Parse JSON
-            import json
-            return json.loads(cleaned_text)
+        Args:
+            image: BGR image from OpenCV
 
+        Returns:
+            (dhash, encode_jpeg() blob); the blob is None if encoding failed
+        """
+        image_hash = dhash(image)
+        try:
+            image_blob = self.encode_jpeg(image)
         except Exception as e:
-            logger.error(f"Failed to parse Gemini response: {e}")
-            logger.debug(f"Raw response: {response_text}")
+            logger.error(f"Verification image encoding failed: {e}")
+            image_blob = None  # Each verifier retries and reports its own error
+        return image_hash, image_blob
 
-            # Return safe default
-            return {
-                'is_genuine_violation': True,  # When in doubt, flag it
-                'confidence': 0.5,
-                'reasoning': 'Failed to parse AI response',
-                'raw_response': response_text
-            }
+    @staticmethod
+    async def _offload(func, *args):
+        """Run CPU-bound image work off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def encode_jpeg(self, image: np.ndarray) -> Dict:
+        """
+        Encode a frame once as a JPEG blob that can be sent with any verification prompt
+
+        The frame is shrunk to MAX_IMAGE_EDGE on its long side first; Gemini
+        downscales larger images internally anyway, so this only saves upload.
+
+        Args:
+            image: BGR image from OpenCV
+
+        Returns:
+            Gemini inline blob: {'mime_type': 'image/jpeg', 'data': bytes}
+        """
+        h, w = image.shape[:2]
+        scale = self.MAX_IMAGE_EDGE / max(h, w)
+        if scale < 1:
+            image = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY])
+        if not ok:
+            raise ValueError("JPEG encoding of verification image failed")
+        return {'mime_type': 'image/jpeg', 'data': encoded.tobytes()}
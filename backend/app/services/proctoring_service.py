@@ -1,68 +1,108 @@
-import cv2
 import numpy as np
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
 import logging
+from concurrent.futures import wait
 from datetime import datetime
 import time
-import json
 
 from app.ml_models.face_detector import FaceDetector
 from app.ml_models.eye_tracker import EyeGazeTracker
 from app.ml_models.object_detector import ObjectDetector
 from app.ml_models.audio_analyzer import AudioAnalyzer
+from app.ml_models.face_mesh import SharedFaceMesh
 from app.utils.frame_utils import FrameAnalyzer
+from app.utils.frame_packet import FrameBuffers, FramePacket
+from app.utils.temporal_vote import TemporalVote
 from app.services.gemini_verifier import GeminiViolationVerifier
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-def convert_to_json_serializable(obj: Any) -> Any:
-    """Convert numpy types to Python native types for JSON serialization"""
-    if isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_to_json_serializable(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_json_serializable(item) for item in obj]
-    else:
-        return obj
-
-
 class ProctoringService:
     """
     Main proctoring service that integrates all ML models
+    One instance per connected session (owned by the ConnectionManager)
     """
 
-    def __init__(self):
+    def __init__(self, object_detector: Optional[ObjectDetector] = None):
+        """
+        Initialize the session's detectors
+
+        Args:
+            object_detector: Detector shared across sessions (e.g. an
+                ObjectDetectionBatcher); a private one is created if omitted
+        """
+        # One face mesh inference per frame, shared by the face detector and eye tracker.
+        # Only the first face's landmarks are used (for gaze); multiple people are
+        # counted by FaceDetector's BlazeFace detector, so the mesh tracks one face
+        self.face_mesh = SharedFaceMesh(
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.3,
+            min_tracking_confidence=0.3
+        )
+
         # Initialize all detectors
-        self.face_detector = FaceDetector()
+        self.face_detector = FaceDetector(face_mesh=self.face_mesh)
         self.eye_tracker = EyeGazeTracker(
-            threshold_seconds=settings.EYE_GAZE_THRESHOLD
+            threshold_seconds=settings.EYE_GAZE_THRESHOLD,
+            face_mesh=self.face_mesh
         )
-        self.object_detector = ObjectDetector(
+        self.object_detector = object_detector or ObjectDetector(
+            model_path=settings.OBJECT_DETECTOR_MODEL,
             confidence_threshold=settings.MODEL_CONFIDENCE_THRESHOLD
         )
         self.audio_analyzer = AudioAnalyzer()
 
+        # Object detection near the candidate runs at a reduced resolution between
+        # periodic full-frame passes (needs a private detector: a shared batcher
+        # already amortizes full-frame inference across sessions)
+        self._roi_detection = (
+            settings.OBJECT_ROI_FULL_FRAME_INTERVAL > 0
+            and getattr(self.object_detector, 'supports_roi', False)
+        )
+        self._frames_since_full_detection = settings.OBJECT_ROI_FULL_FRAME_INTERVAL  # First frame runs full
+        # Adaptive object detection rate: after every OBJECT_IDLE_RAMP_SECONDS without
+        # a detection one more frame is skipped between runs (up to OBJECT_IDLE_SKIP_MAX)
+        self._object_skip = 0
+        self._frames_until_objects = 0
+        self._objects_clean_since: Optional[float] = None
+
+        # Batched detection is started before the face models run and collected after them
+        self._overlap_objects = hasattr(self.object_detector, 'detect_objects_async')
+        if self._overlap_objects:
+            self.object_detector.attach()  # Lets the batcher size its batches to the live sessions
+
         # Frame analyzer for optimization
         self.frame_analyzer = FrameAnalyzer(
-            ssim_threshold=0.95,  # Skip frames with >95% similarity
+            hash_threshold=2,     # Skip frames whose perceptual hash matches a recent frame
+            pixel_threshold=24,   # ...and whose thumbnail differs from it only by noise
             black_threshold=30    # Detect black screens
         )
 
         # Gemini AI verifier for reducing false positives
         self.gemini_verifier = GeminiViolationVerifier()
+        self._verifiers = {
+            'multiple_persons': self.gemini_verifier.verify_multiple_persons_violation,
+            'eyes_looking_away': self.gemini_verifier.verify_eye_tracking_violation,
+            'prohibited_object': self.gemini_verifier.verify_object_detection_violation,
+        }
+        # Cheap pre-filter in front of Gemini: face/object violations are only sent
+        # for verification once they persist across recent frames (gaze violations
+        # already need EYE_GAZE_THRESHOLD seconds of looking away)
+        self._face_vote = TemporalVote(settings.AI_PREFILTER_WINDOW, settings.AI_PREFILTER_MIN_HITS)
+        self._object_vote = TemporalVote(settings.AI_PREFILTER_WINDOW, settings.AI_PREFILTER_MIN_HITS)
+        # Verifications requested by the last processed frame: [(type, violation, data)]
+        self.pending_verifications: List = []
+        self._pending_image: Optional[np.ndarray] = None  # Copy of that frame
+        # Violation types with a Gemini call in flight; repeats are coalesced into it
+        self._verifying: Set[str] = set()
 
         # Alert cooldown to prevent spam
         self.alert_cooldown = settings.ALERT_COOLDOWN_SECONDS
-        self.last_alert_times = {}
+        self.last_alert_times: Dict[tuple, float] = {}  # {(session_id, alert_type): time.monotonic()}
 
         # Session tracking
         self.session_data = {}
@@ -70,22 +110,46 @@ class ProctoringService:
         # Frame processing optimization
         self.frame_skip_mod = 1  # Process all frames (1 = no skipping)
 
+        # RGB/GRAY conversions are done once per frame into reused buffers
+        # (the downscaled frame is what the object detector reads, so it is allocated by it)
+        self.frame_buffers = FrameBuffers(
+            small_width=settings.MODEL_INPUT_MAX_WIDTH,
+            allocator=getattr(self.object_detector, 'host_buffer', None)
+        )
+        self.frame_id = 0
+
         logger.info("ProctoringService initialized with all detectors, frame optimization, and AI verification")
 
-    def process_frame(self, image: np.ndarray, session_id: str) -> Dict:
+    def process_frame(self, image: np.ndarray, session_id: str, now: Optional[float] = None) -> Dict:
         """
         Process a single video frame with all detectors
         Uses frame optimization to skip duplicate/black frames
+        Runs on a worker thread; the session pipeline processes one frame at a time
 
         Args:
             image: BGR image from OpenCV
             session_id: Unique session identifier
+            now: time.monotonic() reading for this frame (read here if not given)
 
         Returns:
             Dictionary with all detection results and alerts
         """
+        if now is None:
+            now = time.monotonic()
+
+        # Wall-clock time is read once per frame and shared by the results,
+        # violations and alerts created for it
+        wall_time = time.time()
+        timestamp = datetime.fromtimestamp(wall_time).isoformat()
+        alert_ms = int(wall_time * 1000)
+
+        self.frame_id += 1
+        packet = self.frame_buffers.packet(image, self.frame_id)
+        self.pending_verifications = []
+        self._pending_image = None
+
         results = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'session_id': session_id,
             'violations': [],
             'alerts': [],
@@ -95,153 +159,156 @@ class ProctoringService:
             'status': 'ok',
             'frame_processed': True
         }
+        object_future = None
 
         try:
             # Check if frame should be processed (optimization)
             should_process, skip_reason = self.frame_analyzer.should_process_frame(
                 image,
-                skip_mod=self.frame_skip_mod
+                skip_mod=self.frame_skip_mod,
+                gray=packet.gray  # Shared with the eye tracker
             )
 
             if not should_process:
-                logger.debug(f"Frame skipped: {skip_reason}")
+                logger.debug("Frame skipped: %s", skip_reason)
                 results['status'] = 'skipped'
                 results['skip_reason'] = skip_reason
                 results['frame_processed'] = False
-                return convert_to_json_serializable(results)
+                return results
 
-            # Add black screen violation if detected
-            if self.frame_analyzer.is_black_screen(image):
+            # Add black screen violation if detected (intensity measured by should_process_frame)
+            if self.frame_analyzer.last_mean < self.frame_analyzer.black_threshold:
                 violation = {
                     'type': 'black_screen',
                     'severity': 'high',
                     'description': 'Camera appears to be covered or off',
-                    'timestamp': datetime.now().isoformat(),
-                    'data': {'avg_intensity': float(np.mean(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)))}
+                    'timestamp': timestamp,
+                    'data': {'avg_intensity': self.frame_analyzer.last_mean}
                 }
                 results['violations'].append(violation)
-                if self._should_create_alert(session_id, 'black_screen'):
-                    results['alerts'].append(self._create_alert(violation))
+                if self._should_create_alert(session_id, 'black_screen', now):
+                    results['alerts'].append(self._create_alert(violation, alert_ms))
+
+            # Clean sessions run object detection on only some frames (see _update_object_rate)
+            run_objects = self._frames_until_objects <= 0
+            if run_objects:
+                self._frames_until_objects = self._object_skip
+            else:
+                self._frames_until_objects -= 1
+            results['detector_skips'] = {'object': self._object_skip}
+
+            # A shared batcher detects objects on its own thread, so queue the frame
+            # now and run the face and gaze models while the batch computes
+            if self._overlap_objects and run_objects:
+                object_future = self.object_detector.detect_objects_async(packet.bgr_small)
+
             # 1. Face Detection - Check for multiple people
             face_result = self.face_detector.check_multiple_faces(
-                image,
+                packet,
                 max_allowed=settings.MAX_FACES_ALLOWED
             )
             results['face_detection'] = face_result
+            face_persistent = bool(self._face_vote.update((True,) if face_result['violation'] else ()))
 
             if face_result['violation']:
-                # Only verify with AI if we're about to create an alert
-                should_alert = self._should_create_alert(session_id, 'multiple_persons')
+                # Only verify with AI if we're about to create an alert (and the
+                # extra faces aren't a single-frame glitch)
+                should_alert = (
+                    (face_persistent or not settings.ENABLE_AI_VERIFICATION)
+                    and self._should_create_alert(session_id, 'multiple_persons', now)
+                )
 
                 violation = {
                     'type': 'multiple_persons',
                     'severity': 'high',
                     'description': f"Detected {face_result['num_faces']} persons",
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': timestamp,
                     'data': face_result
                 }
 
-                # AI Verification - ONLY when creating alert
+                # AI Verification - ONLY when creating alert (runs later on the event loop)
                 if should_alert and settings.ENABLE_AI_VERIFICATION:
-                    logger.debug(f"Verifying multiple_persons violation with Gemini AI...")
-                    ai_verification = self.gemini_verifier.verify_multiple_persons_violation(image, face_result)
-                    violation['ai_verified'] = ai_verification['verified']
-                    violation['ai_confidence'] = ai_verification['confidence']
-                    violation['ai_reasoning'] = ai_verification['reasoning']
-
-                    if ai_verification['verified'] and ai_verification['confidence'] >= settings.AI_VERIFICATION_CONFIDENCE_THRESHOLD:
-                        results['violations'].append(violation)
-                        results['alerts'].append(self._create_alert(violation))
-                        logger.info(f"✅ AI APPROVED multiple_persons violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']} - ALERT CREATED")
-                    else:
-                        logger.info(f"❌ AI REJECTED multiple_persons violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']}")
+                    self._queue_verification('multiple_persons', image, violation, face_result)
                 elif should_alert:
                     results['violations'].append(violation)
-                    results['alerts'].append(self._create_alert(violation))
+                    results['alerts'].append(self._create_alert(violation, alert_ms))
                 else:
                     results['violations'].append(violation)
 
             # 2. Eye Gaze Tracking - Track even with multiple faces
             if face_result['num_faces'] >= 1:
-                gaze_result = self.eye_tracker.track_gaze(image)
+                gaze_result = self.eye_tracker.track_gaze(packet, now)
                 results['eye_tracking'] = gaze_result
 
-                # Log gaze status for debugging
-                logger.debug(f"Gaze: {gaze_result.get('gaze_direction')} | Looking away: {gaze_result.get('looking_away')} | Duration: {gaze_result.get('duration', 0):.1f}s")
+                # Log gaze status for debugging (guarded: runs every frame)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Gaze: {gaze_result.get('gaze_direction')} | Looking away: {gaze_result.get('looking_away')} | Duration: {gaze_result.get('duration', 0):.1f}s")
 
                 if gaze_result['violation']:
                     # Only verify with AI if we're about to create an alert (not in cooldown)
-                    should_alert = self._should_create_alert(session_id, 'eyes_looking_away')
+                    should_alert = self._should_create_alert(session_id, 'eyes_looking_away', now)
 
                     violation = {
                         'type': 'eyes_looking_away',
                         'severity': 'medium',
                         'description': f"Eyes looking {gaze_result['gaze_direction']} for {gaze_result['duration']:.1f}s",
-                        'timestamp': datetime.now().isoformat(),
+                        'timestamp': timestamp,
                         'data': gaze_result
                     }
 
                     # AI Verification - ONLY when creating alert (saves API calls & latency)
                     if should_alert and settings.ENABLE_AI_VERIFICATION:
-                        logger.debug(f"Verifying eye_tracking violation with Gemini AI...")
-                        ai_verification = self.gemini_verifier.verify_eye_tracking_violation(image, gaze_result)
-                        violation['ai_verified'] = ai_verification['verified']
-                        violation['ai_confidence'] = ai_verification['confidence']
-                        violation['ai_reasoning'] = ai_verification['reasoning']
-
-                        # Only create alert if AI confirms it's genuine
-                        if ai_verification['verified'] and ai_verification['confidence'] >= settings.AI_VERIFICATION_CONFIDENCE_THRESHOLD:
-                            results['violations'].append(violation)
-                            results['alerts'].append(self._create_alert(violation))
-                            logger.info(f"✅ AI APPROVED eye_tracking violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']} - ALERT CREATED")
-                        else:
-                            logger.info(f"❌ AI REJECTED eye_tracking violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']}")
+                        self._queue_verification('eyes_looking_away', image, violation, gaze_result)
                     elif should_alert:
                         # No AI verification, create alert immediately
                         results['violations'].append(violation)
-                        results['alerts'].append(self._create_alert(violation))
+                        results['alerts'].append(self._create_alert(violation, alert_ms))
                     else:
                         # In cooldown, add violation but no alert
                         results['violations'].append(violation)
 
             # 3. Object Detection - Check for phones and prohibited items
-            object_result = self.object_detector.check_prohibited_objects(image)
-            results['object_detection'] = object_result
-
-            if object_result['violation']:
-                # Only verify with AI if we're about to create an alert
-                should_alert = self._should_create_alert(session_id, 'prohibited_object')
-
-                severity = 'critical' if object_result['has_phone'] else 'high'
-                objects_list = [obj['class_name'] for obj in object_result['objects']]
-
-                violation = {
-                    'type': 'prohibited_object',
-                    'severity': severity,
-                    'description': f"Detected: {', '.join(objects_list)}",
-                    'timestamp': datetime.now().isoformat(),
-                    'data': object_result
-                }
+            if run_objects:
+                if object_future is not None:
+                    object_result = self.object_detector.summarize_objects(
+                        ObjectDetector.scale_detections(object_future.result(), *packet.small_scale)
+                    )
+                else:
+                    object_result = self._check_objects(packet, face_result['faces'])
+                results['object_detection'] = object_result
+                self._update_object_rate(object_result, now)
+                persistent_objects = self._object_vote.update(
+                    obj['class_id'] for obj in object_result['objects']
+                    if obj['confidence'] > settings.AI_PREFILTER_MIN_CONFIDENCE
+                )
+
+                if object_result['violation']:
+                    # Only verify with AI if we're about to create an alert (and a
+                    # confident detection of the object has persisted)
+                    should_alert = (
+                        (persistent_objects or not settings.ENABLE_AI_VERIFICATION)
+                        and self._should_create_alert(session_id, 'prohibited_object', now)
+                    )
+
+                    severity = 'critical' if object_result['has_phone'] else 'high'
+                    objects_list = [obj['class_name'] for obj in object_result['objects']]
 
-                # AI Verification - ONLY when creating alert
-                if should_alert and settings.ENABLE_AI_VERIFICATION:
-                    logger.debug(f"Verifying object_detection violation with Gemini AI...")
-                    ai_verification = self.gemini_verifier.verify_object_detection_violation(image, object_result)
-                    violation['ai_verified'] = ai_verification['verified']
-                    violation['ai_confidence'] = ai_verification['confidence']
-                    violation['ai_reasoning'] = ai_verification['reasoning']
+                    violation = {
+                        'type': 'prohibited_object',
+                        'severity': severity,
+                        'description': f"Detected: {', '.join(objects_list)}",
+                        'timestamp': timestamp,
+                        'data': object_result
+                    }
 
-                    if ai_verification['verified'] and ai_verification['confidence'] >= settings.AI_VERIFICATION_CONFIDENCE_THRESHOLD:
+                    # AI Verification - ONLY when creating alert (runs later on the event loop)
+                    if should_alert and settings.ENABLE_AI_VERIFICATION:
+                        self._queue_verification('prohibited_object', image, violation, object_result)
+                    elif should_alert:
                         results['violations'].append(violation)
-                        results['alerts'].append(self._create_alert(violation))
-                        logger.info(f"✅ AI APPROVED object_detection violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']} - ALERT CREATED")
+                        results['alerts'].append(self._create_alert(violation, alert_ms))
                     else:
-                        logger.info(f"❌ AI REJECTED object_detection violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']}")
-                elif should_alert:
-                    results['violations'].append(violation)
-                    results['alerts'].append(self._create_alert(violation))
-                else:
-                    results['violations'].append(violation)
+                        results['violations'].append(violation)
 
             # Update status
             if results['violations']:
@@ -252,22 +319,202 @@ class ProctoringService:
             results['status'] = 'error'
             results['error'] = str(e)
 
-        # Convert all numpy types to JSON serializable types
-        return convert_to_json_serializable(results)
+        finally:
+            # The batcher reads the frame until its detection is done, and the
+            # caller reuses the buffer once this returns
+            if object_future is not None:
+                wait((object_future,))
 
-    def process_audio(self, audio_data: np.ndarray, session_id: str) -> Dict:
+        # NumPy values are left as-is: results are encoded with orjson (app.utils.serialization)
+        return results
+
+    def _update_object_rate(self, object_result: Dict, now: float):
+        """
+        Adapt how often object detection runs to what it has been finding
+
+        Any detection (even one that doesn't raise a violation) brings the
+        session straight back to every frame; a clean stretch of
+        OBJECT_IDLE_RAMP_SECONDS skips one more frame between runs.
+
+        Args:
+            object_result: Result of this frame's object detection
+            now: time.monotonic() reading for the frame
+        """
+        if object_result['objects'] or not settings.OBJECT_IDLE_SKIP_MAX:
+            self._object_skip = 0
+            self._frames_until_objects = 0
+            self._objects_clean_since = now
+        elif self._objects_clean_since is None:
+            self._objects_clean_since = now
+        elif now - self._objects_clean_since >= settings.OBJECT_IDLE_RAMP_SECONDS:
+            self._object_skip = min(self._object_skip + 1, settings.OBJECT_IDLE_SKIP_MAX)
+            self._objects_clean_since = now
+
+    def _check_objects(self, packet: FramePacket, faces: Dict) -> Dict:
+        """
+        Run object detection around the candidate, or on the whole frame
+
+        Args:
+            packet: Current frame
+            faces: Face arrays from this frame's face detection
+
+        Returns:
+            Object detection result with violation status
+        """
+        image = packet.bgr
+        roi = self._person_roi(faces, image.shape) if self._roi_detection else None
+        if roi is None or self._frames_since_full_detection + 1 >= settings.OBJECT_ROI_FULL_FRAME_INTERVAL:
+            # Periodic full-frame pass catches objects away from the candidate. It runs
+            # on the frame already downscaled for the face models: the detector
+            # would shrink it to its input size anyway
+            self._frames_since_full_detection = 0
+            detections = self.object_detector.detect_objects(packet.bgr_small)
+            return self.object_detector.summarize_objects(
+                ObjectDetector.scale_detections(detections, *packet.small_scale)
+            )
+
+        self._frames_since_full_detection += 1
+        return self.object_detector.summarize_objects(self.object_detector.detect_objects_in_roi(image, roi))
+
+    @staticmethod
+    def _person_roi(faces: Dict, image_shape) -> Optional[tuple]:
+        """
+        Region around the detected faces where held objects are expected
+
+        Args:
+            faces: Face arrays from face detection
+            image_shape: Shape of the frame
+
+        Returns:
+            (x1, y1, x2, y2) pixel region, or None when no face was found
+        """
+        if not faces['count']:
+            return None
+
+        h, w = image_shape[:2]
+        x, y, bw, bh = faces['bboxes'].T
+        # A face-width and a half either side, half a face above, torso and hands below
+        x1 = int((x - 1.5 * bw).min())
+        y1 = int((y - 0.5 * bh).min())
+        x2 = int((x + 2.5 * bw).max())
+        y2 = int((y + 4 * bh).max())
+        x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, w), min(y2, h)
+        if x2 - x1 < 32 or y2 - y1 < 32:
+            return None
+        return x1, y1, x2, y2
+
+    def _queue_verification(self, violation_type: str, image: np.ndarray, violation: Dict, data: Dict):
+        """Defer Gemini verification of a violation to verify_violations()"""
+        # A verification of the same violation type is still running: its verdict
+        # (and alert) covers this one too, so don't spend another API call on it
+        if violation_type in self._verifying:
+            logger.debug(f"{violation_type} verification already in flight, coalescing")
+            return
+
+        # The frame buffer is reused once processing returns, so keep one copy per
+        # frame (only happens when an alert is about to fire, i.e. at most once per cooldown)
+        if self._pending_image is None:
+            self._pending_image = image.copy()
+        self.pending_verifications.append((violation_type, violation, data))
+
+    def take_verifications(self) -> Optional[Tuple[List, np.ndarray]]:
+        """
+        Hand over the verifications requested by the last processed frame
+
+        Call on the event loop right after process_frame(); the returned
+        verifications count as in flight until verify_violations() finishes.
+
+        Returns:
+            (pending, image) for verify_violations(), or None if nothing is pending
+        """
+        pending, self.pending_verifications = self.pending_verifications, []
+        image, self._pending_image = self._pending_image, None
+        if not pending:
+            return None
+
+        self._verifying.update(violation_type for violation_type, _, _ in pending)
+        return pending, image
+
+    async def verify_violations(self, verifications: Tuple[List, np.ndarray], session_id: str) -> Dict:
+        """
+        Verify violations with Gemini and build a result with the confirmed ones
+
+        Runs on the event loop as its own task, so frames keep being processed
+        and sent while the API calls are outstanding.
+
+        Args:
+            verifications: Value returned by take_verifications()
+            session_id: Unique session identifier
+
+        Returns:
+            Results dictionary (like process_frame()'s) holding the AI-approved violations and alerts
+        """
+        pending, image = verifications
+        results = {
+            'timestamp': pending[0][1]['timestamp'],  # Of the frame the violations were seen in
+            'session_id': session_id,
+            'violations': [],
+            'alerts': [],
+            'status': 'ok',
+            'frame_processed': False,
+            'ai_verification': True
+        }
+
+        try:
+            # One hash and JPEG encode of the frame, off the event loop, shared by
+            # every verifier it is sent to (a disabled verifier needs neither)
+            image_hash = image_blob = None
+            if self.gemini_verifier.enabled:
+                image_hash, image_blob = await asyncio.get_running_loop().run_in_executor(
+                    None, self.gemini_verifier.prepare_image, image
+                )
+
+            verdicts = await asyncio.gather(*(
+                self._verifiers[violation_type](image, data, image_blob, image_hash)
+                for violation_type, _, data in pending
+            ))
+        finally:
+            self._verifying.difference_update(violation_type for violation_type, _, _ in pending)
+
+        for (violation_type, violation, _), ai_verification in zip(pending, verdicts):
+            logger.debug(f"Verified {violation_type} violation with Gemini AI")
+            violation['ai_verified'] = ai_verification['verified']
+            violation['ai_confidence'] = ai_verification['confidence']
+            violation['ai_reasoning'] = ai_verification['reasoning']
+
+            # Only create alert if AI confirms it's genuine
+            if ai_verification['verified'] and ai_verification['confidence'] >= settings.AI_VERIFICATION_CONFIDENCE_THRESHOLD:
+                results['violations'].append(violation)
+                results['alerts'].append(self._create_alert(violation))
+                logger.info(f"✅ AI APPROVED {violation_type} violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']} - ALERT CREATED")
+            else:
+                logger.info(f"❌ AI REJECTED {violation_type} violation - confidence: {ai_verification['confidence']:.2f}, reason: {ai_verification['reasoning']}")
+
+        if results['violations']:
+            results['status'] = 'violations_detected'
+
+        return results
+
+    def process_audio(self, audio_data: np.ndarray, session_id: str, now: Optional[float] = None) -> Dict:
         """
         Process audio chunk
 
         Args:
             audio_data: Audio data as numpy array
             session_id: Unique session identifier
+            now: time.monotonic() reading for this chunk (read here if not given)
 
         Returns:
             Dictionary with audio analysis results
         """
+        if now is None:
+            now = time.monotonic()
+
+        wall_time = time.time()
+        timestamp = datetime.fromtimestamp(wall_time).isoformat()
+
         results = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'session_id': session_id,
             'violations': [],
             'alerts': [],
@@ -277,21 +524,21 @@ class ProctoringService:
 
         try:
             # Analyze audio
-            audio_result = self.audio_analyzer.analyze_audio(audio_data)
+            audio_result = self.audio_analyzer.analyze_audio(audio_data, now)
             results['audio_analysis'] = audio_result
 
-            if audio_result['violation']:
+            if audio_result.violation:
                 violation = {
                     'type': 'audio_anomaly',
                     'severity': 'medium',
-                    'description': f"Audio anomaly: {audio_result['anomaly_type']}",
-                    'timestamp': datetime.now().isoformat(),
+                    'description': f"Audio anomaly: {audio_result.anomaly_type}",
+                    'timestamp': timestamp,
                     'data': audio_result
                 }
                 results['violations'].append(violation)
 
-                if self._should_create_alert(session_id, 'audio_anomaly'):
-                    results['alerts'].append(self._create_alert(violation))
+                if self._should_create_alert(session_id, 'audio_anomaly', now):
+                    results['alerts'].append(self._create_alert(violation, int(wall_time * 1000)))
 
             if results['violations']:
                 results['status'] = 'violations_detected'
@@ -303,44 +550,43 @@ class ProctoringService:
 
         return results
 
-    def _should_create_alert(self, session_id: str, alert_type: str) -> bool:
+    def _should_create_alert(self, session_id: str, alert_type: str, current_time: float) -> bool:
         """
         Check if an alert should be created based on cooldown
 
         Args:
             session_id: Session identifier
             alert_type: Type of alert
+            current_time: time.monotonic() reading for the current frame
 
         Returns:
             True if alert should be created
         """
-        key = f"{session_id}_{alert_type}"
-        current_time = time.time()
-
-        if key not in self.last_alert_times:
-            self.last_alert_times[key] = current_time
-            return True
-
-        time_since_last = current_time - self.last_alert_times[key]
+        key = (session_id, alert_type)
 
-        if time_since_last >= self.alert_cooldown:
+        last_time = self.last_alert_times.get(key)
+        if last_time is None or current_time - last_time >= self.alert_cooldown:
             self.last_alert_times[key] = current_time
             return True
 
         return False
 
-    def _create_alert(self, violation: Dict) -> Dict:
+    def _create_alert(self, violation: Dict, created_ms: Optional[int] = None) -> Dict:
         """
         Create an alert from a violation
 
         Args:
             violation: Violation data
+            created_ms: Epoch milliseconds for the alert id (current time if not given)
 
         Returns:
             Alert dictionary
         """
+        if created_ms is None:
+            created_ms = int(time.time() * 1000)
+
         return {
-            'alert_id': f"{violation['type']}_{int(time.time() * 1000)}",
+            'alert_id': f"{violation['type']}_{created_ms}",
             'type': violation['type'],
             'severity': violation['severity'],
             'message': violation['description'],
@@ -367,11 +613,6 @@ class ProctoringService:
             'frames_skipped': 0
         }
 
-        # Reset trackers
-        self.eye_tracker.reset()
-        self.audio_analyzer.reset()
-        self.frame_analyzer.reset()
-
         logger.info(f"Started proctoring session: {session_id}")
 
         return self.session_data[session_id]
@@ -390,12 +631,22 @@ class ProctoringService:
             self.session_data[session_id]['end_time'] = datetime.now().isoformat()
             self.session_data[session_id]['status'] = 'ended'
 
+            # Cooldowns are meaningless once the session is over
+            for key in [key for key in self.last_alert_times if key[0] == session_id]:
+                del self.last_alert_times[key]
+
             logger.info(f"Ended proctoring session: {session_id}")
 
             return self.session_data[session_id]
 
         return {'error': 'Session not found'}
 
+    def close(self):
+        """Release model resources (call once no frame is being processed)"""
+        self.face_mesh.close()
+        if self._overlap_objects:
+            self.object_detector.detach()
+
     def get_session_summary(self, session_id: str) -> Dict:
         """
         Get session summary
@@ -1,3 +1,8 @@
 from app.utils.frame_utils import FrameAnalyzer
+from app.utils.frame_decoder import FrameDecoder
+from app.utils.frame_packet import FrameBuffers, FramePacket
+from app.utils.image_hash import dhash, hamming_distance
+from app.utils.serialization import dumps
+from app.utils.temporal_vote import TemporalVote
 
-__all__ = ['FrameAnalyzer']
+__all__ = ['FrameAnalyzer', 'FrameDecoder', 'FrameBuffers', 'FramePacket', 'dhash', 'hamming_distance', 'dumps', 'TemporalVote']
@@ -0,0 +1,161 @@
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# libjpeg-turbo (SIMD Huffman + IDCT + color conversion) via PyTurboJPEG.
+# Both the Python package and the native libturbojpeg library are optional;
+# if either is missing we fall back to OpenCV's decoder. PyTurboJPEG 2.x
+# (decode into a caller buffer) needs libjpeg-turbo 3.0 or later.
+try:
+    import inspect
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _tj = TurboJPEG()
+    if 'dst' not in inspect.signature(_tj.decode).parameters:
+        raise RuntimeError("PyTurboJPEG 2.x is required (decode() has no dst= in this version)")
+except Exception as e:  # ImportError, or RuntimeError/OSError when libturbojpeg is missing or too old
+    _tj = None
+    _tj_error = str(e)
+
+
+class FrameDecoder:
+    """
+    Decodes JPEG frames received over the WebSocket into BGR images
+    Uses libjpeg-turbo when available and falls back to cv2.imdecode
+
+    With libjpeg-turbo, frames for a session are decoded into reusable
+    per-session scratch buffers instead of a fresh HxWx3 allocation per frame.
+    A decoded frame stays owned by the caller until it is handed back with
+    release(), so a frame still being processed is never overwritten.
+    decode() may run on a worker thread while release() runs on the event
+    loop; the free lists only see single append/pop calls, which the GIL
+    keeps atomic.
+    """
+
+    # Frames in flight per session: one decoding, one waiting, one in inference
+    MAX_BUFFERS_PER_SESSION = 3
+
+    def __init__(
+        self,
+        max_width: int = 0,
+        allocator: Optional[Callable[[Tuple[int, ...]], np.ndarray]] = None,
+        require_turbojpeg: bool = False
+    ):
+        """
+        Initialize decoder
+
+        Args:
+            max_width: Downscale frames wider than this once at decode time (0 = keep full size)
+            allocator: Allocates scratch buffers from a shape (e.g. ObjectDetector.host_buffer
+                to decode into page-locked memory); np.empty by default. May be set later.
+            require_turbojpeg: Raise instead of falling back to OpenCV when libjpeg-turbo is unusable
+
+        Raises:
+            RuntimeError: If require_turbojpeg is set and libjpeg-turbo cannot be loaded
+        """
+        if _tj is None and require_turbojpeg:
+            raise RuntimeError(f"libjpeg-turbo is required but unavailable: {_tj_error}")
+
+        self.use_turbojpeg = _tj is not None
+        self.max_width = max_width
+        self.allocator = allocator
+
+        # Downscaling factors libjpeg-turbo can apply inside the IDCT, largest first
+        self._scaling_factors = (
+            sorted((f for f in _tj.scaling_factors if f[0] < f[1]),
+                   key=lambda f: f[0] / f[1], reverse=True)
+            if self.use_turbojpeg else []
+        )
+
+        # Free scratch buffers per session: {session_id: [buffer, ...]}
+        self._scratch: Dict[str, List[np.ndarray]] = {}
+
+        if self.use_turbojpeg:
+            logger.info("FrameDecoder initialized with libjpeg-turbo")
+        else:
+            logger.warning(f"libjpeg-turbo unavailable ({_tj_error}), using OpenCV JPEG decoder")
+
+    def decode(self, data: bytes, session_id: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Decode an encoded frame into a BGR image
+
+        Args:
+            data: Encoded image bytes (JPEG from the frontend canvas)
+            session_id: Session to take a scratch buffer from (None allocates a new array)
+
+        Returns:
+            BGR image as numpy array, or None if decoding failed
+        """
+        if self.use_turbojpeg:
+            try:
+                width, height, _, _ = _tj.decode_header(data)
+
+                # Downscaling during the IDCT is cheaper than resizing afterwards
+                scaling_factor = self._scaling_factor(width)
+                if scaling_factor is not None:
+                    num, denom = scaling_factor
+                    width = (width * num + denom - 1) // denom
+                    height = (height * num + denom - 1) // denom
+
+                buffer = None
+                if session_id is not None:
+                    buffer = self._acquire(session_id, (height, width, 3))
+                return _tj.decode(data, pixel_format=TJPF_BGR, scaling_factor=scaling_factor, dst=buffer)
+            except Exception as e:
+                # Not a JPEG (or corrupt) - let OpenCV have a go at it
+                logger.debug(f"TurboJPEG decode failed, falling back to OpenCV: {e}")
+
+        nparr = np.frombuffer(data, np.uint8)
+        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+        if image is not None and self.max_width and image.shape[1] > self.max_width:
+            height, width = image.shape[:2]
+            new_height = round(height * self.max_width / width)
+            image = cv2.resize(image, (self.max_width, new_height), interpolation=cv2.INTER_AREA)
+
+        return image
+
+    def release(self, session_id: str, image: np.ndarray):
+        """
+        Hand a decoded frame back so its buffer can be reused for the next frame
+
+        Args:
+            session_id: Session the frame was decoded for
+            image: Frame returned by decode(); must no longer be referenced
+        """
+        if not self.use_turbojpeg:
+            return
+
+        free = self._scratch.setdefault(session_id, [])
+        if len(free) < self.MAX_BUFFERS_PER_SESSION:
+            free.append(image)
+
+    def end_session(self, session_id: str):
+        """Free all scratch buffers held for a session"""
+        self._scratch.pop(session_id, None)
+
+    def _scaling_factor(self, width: int) -> Optional[Tuple[int, int]]:
+        """Pick the mildest libjpeg-turbo downscale that brings width within max_width"""
+        if not self.max_width or width <= self.max_width:
+            return None
+
+        for num, denom in self._scaling_factors:
+            if (width * num + denom - 1) // denom <= self.max_width:
+                return num, denom
+
+        # Wider than even the strongest factor can handle - use the strongest
+        return self._scaling_factors[-1] if self._scaling_factors else None
+
+    def _acquire(self, session_id: str, shape: Tuple[int, int, int]) -> np.ndarray:
+        """Take a free scratch buffer of the given shape, allocating one if needed"""
+        free = self._scratch.setdefault(session_id, [])
+        while free:
+            buffer = free.pop()
+            # Buffers of a previous resolution are simply discarded
+            if buffer.shape == shape:
+                return buffer
+        if self.allocator is not None:
+            return self.allocator(shape)
+        return np.empty(shape, dtype=np.uint8)
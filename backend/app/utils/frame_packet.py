@@ -0,0 +1,124 @@
+import cv2
+import numpy as np
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable, Optional, Tuple
+
+
+@dataclass
+class FramePacket:
+    """
+    One decoded frame plus its colour conversions, shared by all detectors
+
+    RGB and grayscale versions are computed on first access and then reused,
+    so each conversion happens at most once per frame no matter how many
+    detectors ask for it. When scratch buffers of the right size are attached
+    the conversions write into them instead of allocating.
+
+    rgb_small/bgr_small are downscaled copies for models that resize their
+    input internally anyway (e.g. FaceMesh, YOLO); pixel-level work keeps using
+    the full-resolution rgb/gray. small_scale maps coordinates back.
+    """
+    bgr: np.ndarray
+    frame_id: Optional[int] = None  # Lets per-frame results be memoized (e.g. SharedFaceMesh)
+    small_width: int = 0  # Width of rgb_small (0 = same as rgb)
+    rgb_buffer: Optional[np.ndarray] = field(default=None, repr=False)
+    gray_buffer: Optional[np.ndarray] = field(default=None, repr=False)
+    small_bgr_buffer: Optional[np.ndarray] = field(default=None, repr=False)
+    small_rgb_buffer: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    @cached_property
+    def rgb(self) -> np.ndarray:
+        """RGB version of the frame (MediaPipe input)"""
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        """Grayscale version of the frame"""
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY, dst=self.gray_buffer)
+
+    @cached_property
+    def bgr_small(self) -> np.ndarray:
+        """Frame downscaled to small_width (model input)"""
+        h, w = self.bgr.shape[:2]
+        if not self.small_width or w <= self.small_width:
+            return self.bgr
+
+        size = small_size(w, h, self.small_width)
+        return cv2.resize(self.bgr, size, dst=self.small_bgr_buffer, interpolation=cv2.INTER_AREA)
+
+    @cached_property
+    def rgb_small(self) -> np.ndarray:
+        """RGB version downscaled to small_width (model input)"""
+        if self.bgr_small is self.bgr:
+            return self.rgb
+        return cv2.cvtColor(self.bgr_small, cv2.COLOR_BGR2RGB, dst=self.small_rgb_buffer)
+
+    @property
+    def small_scale(self) -> Tuple[float, float]:
+        """(x, y) factors from bgr_small/rgb_small pixel coordinates to the full frame"""
+        h, w = self.bgr.shape[:2]
+        sh, sw = self.bgr_small.shape[:2]
+        return w / sw, h / sh
+
+
+def small_size(w: int, h: int, small_width: int) -> Tuple[int, int]:
+    """(width, height) of a frame downscaled to small_width, keeping aspect ratio"""
+    return small_width, max(1, round(h * small_width / w))
+
+
+class FrameBuffers:
+    """
+    Reusable RGB/GRAY conversion targets for a stream of frames
+    Buffers are reallocated only when the frame size changes
+    """
+
+    def __init__(self, small_width: int = 0, allocator: Optional[Callable[[Tuple[int, ...]], np.ndarray]] = None):
+        """
+        Initialize buffers
+
+        Args:
+            small_width: Width of the downscaled model input (0 = no downscaling)
+            allocator: Allocates the downscaled BGR buffer from a shape (e.g. the
+                object detector's host_buffer, which may page-lock it); np.empty by default
+        """
+        self.small_width = small_width
+        self.allocator = allocator
+        self.rgb: Optional[np.ndarray] = None
+        self.gray: Optional[np.ndarray] = None
+        self.small_bgr: Optional[np.ndarray] = None
+        self.small_rgb: Optional[np.ndarray] = None
+
+    def packet(self, bgr: np.ndarray, frame_id: Optional[int] = None) -> FramePacket:
+        """
+        Wrap a BGR frame in a FramePacket backed by these buffers
+
+        Args:
+            bgr: BGR image from OpenCV
+            frame_id: Increasing id of the frame within its stream
+
+        Returns:
+            FramePacket for the frame
+        """
+        h, w = bgr.shape[:2]
+        if self.gray is None or self.gray.shape != (h, w):
+            self.rgb = np.empty((h, w, 3), dtype=np.uint8)
+            self.gray = np.empty((h, w), dtype=np.uint8)
+
+            self.small_bgr = self.small_rgb = None
+            if self.small_width and w > self.small_width:
+                sw, sh = small_size(w, h, self.small_width)
+                self.small_bgr = (
+                    self.allocator((sh, sw, 3)) if self.allocator is not None
+                    else np.empty((sh, sw, 3), dtype=np.uint8)
+                )
+                self.small_rgb = np.empty((sh, sw, 3), dtype=np.uint8)
+
+        return FramePacket(
+            bgr, frame_id, self.small_width,
+            self.rgb, self.gray, self.small_bgr, self.small_rgb
+        )
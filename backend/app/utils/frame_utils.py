@@ -1,37 +1,163 @@
 import cv2
 import numpy as np
+from collections import deque
 from typing import Optional, Tuple
-from skimage.metrics import structural_similarity as ssim
 import logging
 
+from app.utils.image_hash import dhash, hamming_distance
+
 logger = logging.getLogger(__name__)
 
 
+def _thumb_stats_py(thumb):
+    """
+    Mean intensity and 64-bit difference hash of a grayscale thumbnail in one pass
+
+    The thumbnail is split into a grid of 8 rows x 9 columns of blocks; each
+    hash bit records whether a block is brighter than its right neighbour
+    (the same layout as image_hash.dhash, over block averages of the thumbnail).
+
+    Args:
+        thumb: (H, W) uint8 thumbnail, at least 8x9
+
+    Returns:
+        Tuple of (mean, hash)
+    """
+    h, w = thumb.shape
+    sums = np.zeros((8, 9), dtype=np.int64)
+    for y in range(h):
+        block_y = y * 8 // h
+        for block_x in range(9):
+            # Columns x with x * 9 // w == block_x
+            row_sum = 0
+            for x in range((block_x * w + 8) // 9, ((block_x + 1) * w + 8) // 9):
+                row_sum += np.int64(thumb[y, x])
+            sums[block_y, block_x] += row_sum
+
+    total = 0
+    means = np.empty((8, 9), dtype=np.float64)
+    for block_y in range(8):
+        rows = ((block_y + 1) * h + 7) // 8 - (block_y * h + 7) // 8
+        for block_x in range(9):
+            cols = ((block_x + 1) * w + 8) // 9 - (block_x * w + 8) // 9
+            total += sums[block_y, block_x]
+            means[block_y, block_x] = sums[block_y, block_x] / (rows * cols)
+
+    frame_hash = np.uint64(0)
+    for block_y in range(8):
+        for block_x in range(8):
+            if means[block_y, block_x + 1] > means[block_y, block_x]:
+                frame_hash |= np.uint64(1) << np.uint64(block_y * 8 + block_x)
+    return total / (h * w), frame_hash
+
+
+# Numba is optional here - without it the mean and hash come from OpenCV/NumPy
+try:
+    from numba import njit
+    _thumb_stats = njit(cache=True, fastmath=True)(_thumb_stats_py)
+except ImportError:
+    def _thumb_stats(thumb):
+        return cv2.mean(thumb)[0], dhash(thumb)
+
+
 class FrameAnalyzer:
     """
-    Utility class for frame analysis including SSIM comparison,
+    Utility class for frame analysis including duplicate frame detection,
     black screen detection, and other optimizations
     """
 
-    def __init__(self, ssim_threshold: float = 0.95, black_threshold: float = 30):
+    # Side of the grayscale thumbnail duplicate detection compares (64x64 = 4 KiB)
+    THUMB_SIZE = 64
+
+    def __init__(
+        self,
+        hash_threshold: int = 2,
+        pixel_threshold: int = 24,
+        history: int = 4,
+        black_threshold: float = 30,
+        static_fraction: float = 0.7
+    ):
         """
         Initialize frame analyzer
 
         Args:
-            ssim_threshold: SSIM similarity threshold (0-1). Frames above this are considered duplicates
+            hash_threshold: Max differing dHash bits for a frame to be a duplicate candidate
+            pixel_threshold: Max thumbnail pixel difference (0-255) for a candidate to be a duplicate
+            history: Number of recent distinct frames a new frame is compared against
             black_threshold: Average pixel intensity threshold for black screen detection
+            static_fraction: Share of the frame in one brightness band (1/16 of the range)
+                above which it is a covered lens / static overlay (1 disables)
         """
-        self.ssim_threshold = ssim_threshold
+        self.hash_threshold = hash_threshold
+        self.pixel_threshold = pixel_threshold
         self.black_threshold = black_threshold
-        self.previous_frame = None
+        self.static_fraction = static_fraction
+        # (dhash, thumbnail) of the last distinct frames, so a frame repeating any of
+        # them (e.g. a stream flickering between two images) is caught too
+        self.recent_frames: deque = deque(maxlen=history)
+        self.last_mean: Optional[float] = None  # Average intensity of the last frame seen by should_process_frame
         self.frame_count = 0
 
-        logger.info(f"FrameAnalyzer initialized - SSIM threshold: {ssim_threshold}, "
-                   f"Black threshold: {black_threshold}")
+        # Compile the thumbnail kernel now rather than on the first frame
+        _thumb_stats(np.zeros((self.THUMB_SIZE, self.THUMB_SIZE), dtype=np.uint8))
+
+        logger.info(f"FrameAnalyzer initialized - Hash threshold: {hash_threshold}, "
+                   f"Pixel threshold: {pixel_threshold}, Black threshold: {black_threshold}")
+
+    def thumbnail(self, frame: np.ndarray, gray: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Shrink a frame to a THUMB_SIZE x THUMB_SIZE grayscale thumbnail
+
+        Args:
+            frame: BGR image
+            gray: Grayscale version of the frame, if already computed
+
+        Returns:
+            uint8 thumbnail (area-averaged, so sensor noise mostly cancels out)
+        """
+        size = (self.THUMB_SIZE, self.THUMB_SIZE)
+        if gray is not None:
+            return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+        # Averaging and the BT.601 weighting are both linear, so shrinking first
+        # and converting only the thumbnail gives the same result
+        return cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    @staticmethod
+    def calculate_similarity(thumb1: np.ndarray, thumb2: np.ndarray) -> float:
+        """
+        Similarity of two thumbnails from their mean absolute difference
+
+        Args:
+            thumb1: First grayscale thumbnail
+            thumb2: Second grayscale thumbnail (same size)
+
+        Returns:
+            Similarity value between 0 and 1 (1 = identical)
+        """
+        return 1.0 - cv2.mean(cv2.absdiff(thumb1, thumb2))[0] / 255.0
+
+    @staticmethod
+    def max_difference(thumb1: np.ndarray, thumb2: np.ndarray) -> float:
+        """
+        Largest per-pixel difference between two thumbnails
+
+        Unlike averaged metrics this still reacts to a small object appearing
+        in one corner, while sensor noise is mostly averaged away by INTER_AREA.
+
+        Args:
+            thumb1: First grayscale thumbnail
+            thumb2: Second grayscale thumbnail (same size)
+
+        Returns:
+            Difference in grey levels (0 = identical)
+        """
+        return cv2.norm(thumb1, thumb2, cv2.NORM_INF)
 
     def calculate_ssim(self, frame1: np.ndarray, frame2: np.ndarray) -> float:
         """
         Calculate SSIM (Structural Similarity Index) between two frames
+        Slower than calculate_similarity; not used for duplicate detection
 
         Args:
             frame1: First BGR image
@@ -41,18 +167,11 @@ class FrameAnalyzer:
             SSIM value between 0 and 1 (1 = identical)
         """
         try:
-            # Convert to grayscale for faster comparison
-            gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-            gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+            # Imported on first use: scikit-image (and SciPy) are heavy and only needed here
+            from skimage.metrics import structural_similarity as ssim
 
-            # Resize if images are too large (for performance)
-            if gray1.shape[0] > 480:
-                scale = 480 / gray1.shape[0]
-                gray1 = cv2.resize(gray1, None, fx=scale, fy=scale)
-                gray2 = cv2.resize(gray2, None, fx=scale, fy=scale)
-
-            # Calculate SSIM
-            similarity_index = ssim(gray1, gray2)
+            # Compare the same grayscale thumbnails duplicate detection uses
+            similarity_index = ssim(self.thumbnail(frame1), self.thumbnail(frame2))
 
             return float(similarity_index)
 
@@ -62,7 +181,8 @@ class FrameAnalyzer:
 
     def is_duplicate_frame(self, current_frame: np.ndarray) -> bool:
         """
-        Check if current frame is a duplicate of the previous frame using SSIM
+        Check if current frame is a duplicate of a recent frame
+        Compares dHashes and 64x64 thumbnails, so only those are kept between frames
 
         Args:
             current_frame: Current BGR image
@@ -71,46 +191,51 @@ class FrameAnalyzer:
             True if frame is a duplicate and should be skipped
         """
         self.frame_count += 1
+        thumb = self.thumbnail(current_frame)
+        return self._is_duplicate_thumb(thumb, int(_thumb_stats(thumb)[1]))
 
-        # First frame is never a duplicate
-        if self.previous_frame is None:
-            self.previous_frame = current_frame.copy()
-            return False
+    def _is_duplicate_thumb(self, thumb: np.ndarray, frame_hash: int) -> bool:
+        """Duplicate check of is_duplicate_frame on an already computed thumbnail and hash"""
 
-        # Calculate similarity
-        similarity = self.calculate_ssim(self.previous_frame, current_frame)
+        # The 64-bit hash rules out most distinct frames with one XOR + popcount;
+        # candidates are confirmed on the thumbnail, since the hash alone misses
+        # small changes (e.g. a phone raised at the edge of the frame)
+        for recent_hash, recent_thumb in self.recent_frames:
+            if hamming_distance(recent_hash, frame_hash) > self.hash_threshold:
+                continue
 
-        # Check if frames are too similar (duplicate)
-        is_duplicate = similarity > self.ssim_threshold
+            difference = self.max_difference(recent_thumb, thumb)
+            if difference <= self.pixel_threshold:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Frame {self.frame_count} is duplicate (max difference: {difference:.0f})")
+                return True
 
-        if is_duplicate:
-            logger.debug(f"Frame {self.frame_count} is duplicate (SSIM: {similarity:.3f})")
-        else:
-            # Update previous frame only if not duplicate
-            self.previous_frame = current_frame.copy()
-
-        return is_duplicate
+        # Only distinct frames are remembered, so slow drift still adds up
+        self.recent_frames.append((frame_hash, thumb))
+        return False
 
     def is_black_screen(self, frame: np.ndarray) -> bool:
         """
         Detect if the frame is mostly black (camera covered or off)
 
         Args:
-            frame: BGR image
+            frame: BGR image, or a grayscale image/thumbnail
 
         Returns:
             True if frame is mostly black
         """
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-            # Calculate average pixel intensity
-            avg_intensity = np.mean(gray)
+            if frame.ndim == 2:
+                avg_intensity = cv2.mean(frame)[0]
+            else:
+                # Grayscale is a weighted sum of the channels, so its mean is the
+                # same weighting of the channel means (no conversion needed)
+                blue, green, red = cv2.mean(frame)[:3]
+                avg_intensity = 0.114 * blue + 0.587 * green + 0.299 * red
 
             is_black = avg_intensity < self.black_threshold
 
-            if is_black:
+            if is_black and logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"Black screen detected (avg intensity: {avg_intensity:.1f})")
 
             return is_black
@@ -119,6 +244,28 @@ class FrameAnalyzer:
             logger.error(f"Black screen detection failed: {e}")
             return False
 
+    def is_static_overlay(self, thumb: np.ndarray) -> bool:
+        """
+        Detect a near-uniform frame (lens covered by a sticker or paper, frozen capture card overlay)
+
+        Measures the share of pixels in the most prevalent of 16 brightness
+        bands; a camera image of a person and a room spreads over many bands.
+
+        Args:
+            thumb: Grayscale thumbnail (see thumbnail())
+
+        Returns:
+            True if the frame is dominated by a single tone
+        """
+        hist = cv2.calcHist([thumb], [0], None, [16], [0, 256])
+        prevalent = float(hist.max()) / thumb.size
+
+        is_static = prevalent > self.static_fraction
+        if is_static and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Static overlay detected ({prevalent:.0%} of the frame in one tone)")
+
+        return is_static
+
     def calculate_histogram_similarity(self, frame1: np.ndarray, frame2: np.ndarray) -> float:
         """
         Calculate histogram similarity between two frames
@@ -153,33 +300,54 @@ class FrameAnalyzer:
             logger.error(f"Histogram similarity calculation failed: {e}")
             return 0.0
 
-    def should_process_frame(self, frame: np.ndarray, skip_mod: int = 1) -> Tuple[bool, str]:
+    def should_process_frame(
+        self,
+        frame: np.ndarray,
+        skip_mod: int = 1,
+        gray: Optional[np.ndarray] = None
+    ) -> Tuple[bool, str]:
         """
         Determine if a frame should be processed based on multiple criteria
+        The frame is converted and shrunk once, and one pass over the resulting
+        thumbnail yields the mean (black screen, kept in last_mean) and the hash
+        (duplicate check)
 
         Args:
             frame: BGR image
             skip_mod: Process every Nth frame (1 = process all, 3 = process every 3rd)
+            gray: Grayscale version of the frame, if already computed (e.g. FramePacket.gray)
 
         Returns:
             Tuple of (should_process, reason)
         """
-        # Check black screen
-        if self.is_black_screen(frame):
+        thumb = self.thumbnail(frame, gray)
+        mean, frame_hash = _thumb_stats(thumb)
+
+        # Check black screen (the area-averaged thumbnail has the frame's mean intensity)
+        self.last_mean = float(mean)
+        if self.last_mean < self.black_threshold:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Black screen detected (avg intensity: {self.last_mean:.1f})")
             return False, "black_screen"
 
+        # Check for a covered lens / static overlay (nothing for the detectors to find)
+        if self.is_static_overlay(thumb):
+            return False, "static_overlay"
+
         # Check frame skipping
         if skip_mod > 1 and self.frame_count % skip_mod != 0:
             return False, "frame_skipped"
 
         # Check duplicate
-        if self.is_duplicate_frame(frame):
+        self.frame_count += 1
+        if self._is_duplicate_thumb(thumb, int(frame_hash)):
             return False, "duplicate_frame"
 
         return True, "ok"
 
     def reset(self):
         """Reset the frame analyzer state"""
-        self.previous_frame = None
+        self.recent_frames.clear()
+        self.last_mean = None
         self.frame_count = 0
         logger.debug("FrameAnalyzer state reset")
@@ -0,0 +1,32 @@
+import cv2
+import numpy as np
+
+# Bit weights for packing the 8x8 difference grid into one 64-bit integer
+_BIT_WEIGHTS = (1 << np.arange(64, dtype=np.uint64)).reshape(8, 8)
+
+
+def dhash(image: np.ndarray) -> int:
+    """
+    64-bit difference hash of an image
+
+    The frame is shrunk to 9x8 grey pixels and each bit records whether a
+    pixel is brighter than its right neighbour, so small changes in
+    compression noise, exposure or scale leave the hash (nearly) unchanged.
+
+    Args:
+        image: BGR or grayscale image
+
+    Returns:
+        Hash as a Python int (compare with hamming_distance)
+    """
+    # Shrinking before the grey conversion only converts 72 pixels (both steps are linear)
+    tiny = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+    if tiny.ndim == 3:
+        tiny = cv2.cvtColor(tiny, cv2.COLOR_BGR2GRAY)
+    bits = tiny[:, 1:] > tiny[:, :-1]
+    return int(_BIT_WEIGHTS[bits].sum())
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return (a ^ b).bit_count()
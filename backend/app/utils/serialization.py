@@ -0,0 +1,28 @@
+import numpy as np
+import orjson
+from typing import Any
+
+
+def _default(obj: Any) -> Any:
+    """
+    Fallback for values orjson can't serialize natively
+
+    OPT_SERIALIZE_NUMPY covers C-contiguous arrays of plain dtypes and NumPy
+    scalars; views such as transposes or column slices (and structured arrays)
+    fall through to here.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Serialize a payload to UTF-8 JSON bytes using orjson
+
+    NumPy scalars and arrays are serialized natively, so detector results
+    can be passed through without converting values to Python types first.
+    """
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,38 @@
+from collections import Counter, deque
+from typing import Hashable, Iterable, Set
+
+
+class TemporalVote:
+    """
+    Keeps the labels seen in the last `window` frames and reports the ones
+    present in at least `min_hits` of them
+
+    Used to hold back detections that only flicker up in single frames.
+    """
+
+    def __init__(self, window: int = 5, min_hits: int = 3):
+        """
+        Args:
+            window: Number of recent frames voted over
+            min_hits: Frames within the window a label must appear in
+        """
+        self.min_hits = min_hits
+        self._frames: deque = deque(maxlen=window)
+        self._counts: Counter = Counter()
+
+    def update(self, labels: Iterable[Hashable]) -> Set[Hashable]:
+        """
+        Record one frame's labels
+
+        Args:
+            labels: Labels present in the frame (empty when nothing was seen)
+
+        Returns:
+            Labels that are present in at least min_hits of the recent frames
+        """
+        if len(self._frames) == self._frames.maxlen:
+            self._counts.subtract(self._frames[0])
+        frame = frozenset(labels)
+        self._frames.append(frame)
+        self._counts.update(frame)
+        return {label for label in frame if self._counts[label] >= self.min_hits}
@@ -8,7 +8,7 @@ import {
   useWebSocket,
   useProctoringStatus,
 } from "@/lib/hooks";
-import { Alert } from "@/lib/api/types";
+import { Alert, FrameProcessingResult } from "@/lib/api/types";
 
 export default function InterviewPage() {
   const videoRef = useRef<HTMLVideoElement>(null);
@@ -38,13 +38,14 @@ export default function InterviewPage() {
     onMessage: (data) => {
       console.log("Received data:", data);
 
-      // Handle proctoring results
-      if (data.type === "proctoring_result" && data.data) {
-        const result = data.data;
+      // Handle batched proctoring results
+      if (data.type === "proctoring_batch" && data.results) {
+        const results: FrameProcessingResult[] = data.results;
+        const batchAlerts = results.flatMap((result) => result.alerts ?? []);
 
-        // Add alerts if any
-        if (result.alerts && result.alerts.length > 0) {
-          setAlerts((prev) => [...result.alerts, ...prev].slice(0, 20));
+        // Add alerts if any (newest first)
+        if (batchAlerts.length > 0) {
+          setAlerts((prev) => [...batchAlerts.reverse(), ...prev].slice(0, 20));
         }
       }
     },
@@ -12,6 +12,9 @@ interface UseWebSocketOptions {
 const WS_BASE_URL =
   process.env.NEXT_PUBLIC_WS_URL || "ws://localhost:8000";
 
+// Backend sends orjson-encoded JSON as binary frames
+const textDecoder = new TextDecoder();
+
 export const useWebSocket = (
   sessionId: string | null,
   options?: UseWebSocketOptions
@@ -30,6 +33,7 @@ export const useWebSocket = (
 
     try {
       const ws = new WebSocket(`${WS_BASE_URL}/ws/${sessionId}`);
+      ws.binaryType = "arraybuffer";
 
       ws.onopen = () => {
         console.log("WebSocket connected");
@@ -40,7 +44,11 @@ export const useWebSocket = (
 
       ws.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
+          const text =
+            typeof event.data === "string"
+              ? event.data
+              : textDecoder.decode(event.data);
+          const data = JSON.parse(text);
           console.log("WebSocket message:", data);
           setLastMessage(data);
           options?.onMessage?.(data);